@@ -1,36 +1,89 @@
 import os
-from flask import Flask
+import logging
+from flask import Flask, jsonify
 from flask_migrate import Migrate
 from flask_login import LoginManager
-from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from dotenv import load_dotenv
 
 load_dotenv()
 
-import models
 from models import db
+from services.cache import response_cache
+from services.fragment_cache import fragment_cache
+from services.static_assets import static_assets, build_assets_command
+from services.compression import response_compressor
+from services.list_events import list_events
+from services.passwords import password_hasher
+from services.identity import identity_cache, load_api_user
+from services.instrumentation import instrumentation
+from services.archive import archive_items_command
+from services.db_routing import replica_router
+from services.serializers import APIJSONProvider
 
-bcrypt = Bcrypt()
 login_manager = LoginManager()
 jwt = JWTManager()
 
 def create_app():
     app = Flask(__name__)
+    app.json = APIJSONProvider(app) # orjson when installed, MessagePack for clients that Accept it
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') # Use environment variable for secret key
     app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        'pool_recycle': 250  # Recycle connections
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 250)), # Recycle connections before the server drops idle ones
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'false').lower() in ('1', 'true', 'yes'), # Test connections on checkout
     }
+    for option in ('pool_size', 'max_overflow', 'pool_timeout'): # DB_POOL_SIZE etc.; unset keeps SQLAlchemy's default for the dialect
+        value = os.environ.get(f'DB_{option.upper()}')
+        if value:
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'][option] = int(value)
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') # Use environment variable for database URL
+    replica_url = os.environ.get('DATABASE_REPLICA_URL') # Optional read replica for the read-only routes
+    # Binds don't inherit SQLALCHEMY_ENGINE_OPTIONS, so the replica gets the same pool settings explicitly
+    app.config['SQLALCHEMY_BINDS'] = {'replica': {'url': replica_url, **app.config['SQLALCHEMY_ENGINE_OPTIONS']}} if replica_url else {}
+    app.config['DB_REPLICA_STICKY_SECONDS'] = float(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5)) # Reads stay on the primary this long after a client writes
     app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY') # Use environment variable for JWT secret key
+    app.config['CACHE_TYPE'] = os.environ.get('CACHE_TYPE', 'lru') # lru, redis or null
+    app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL')
+    app.config['CACHE_DEFAULT_TTL'] = int(os.environ.get('CACHE_DEFAULT_TTL', 60)) # Seconds
+    app.config['CACHE_MAX_ENTRIES'] = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))
+    app.config['GZIP_MIN_SIZE'] = int(os.environ.get('GZIP_MIN_SIZE', 1024)) # Bytes; smaller JSON/CSV responses go out uncompressed
+    app.config['GZIP_LEVEL'] = int(os.environ.get('GZIP_LEVEL', 6)) # 0 disables response compression
+    app.config['FRAGMENT_CACHE_MAX_BYTES'] = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 32 * 1024 * 1024)) # Rendered template fragments kept per process; 0 (or CACHE_TYPE=null) disables
+    app.config['EVENTS_BROKER'] = os.environ.get('EVENTS_BROKER', 'memory') # memory (single worker) or redis
+    app.config['EVENTS_REDIS_URL'] = os.environ.get('EVENTS_REDIS_URL')
+    app.config['EVENTS_KEEPALIVE'] = int(os.environ.get('EVENTS_KEEPALIVE', 15)) # Seconds between SSE keepalive comments
+    app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12)) # Existing hashes are upgraded on next login
+    app.config['BCRYPT_MAX_CONCURRENCY'] = int(os.environ.get('BCRYPT_MAX_CONCURRENCY', os.cpu_count() or 1)) # Hashes running at once
+    app.config['BCRYPT_QUEUE_DEPTH'] = int(os.environ.get('BCRYPT_QUEUE_DEPTH', 4 * app.config['BCRYPT_MAX_CONCURRENCY'])) # Hashes waiting before 503s
+    app.config['BCRYPT_QUEUE_TIMEOUT'] = float(os.environ.get('BCRYPT_QUEUE_TIMEOUT', 10)) # Seconds
+    app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO') # DEBUG adds a key=value line per request
+    app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 100)) # Queries at least this slow are logged and sampled
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN') # Bearer token for /metrics; without it only localhost may read it
+    app.config['IDENTITY_CACHE_TTL'] = int(os.environ.get('IDENTITY_CACHE_TTL', 30)) # Seconds a user stays cached per process
+    app.config['IDENTITY_CACHE_MAX_ENTRIES'] = int(os.environ.get('IDENTITY_CACHE_MAX_ENTRIES', 10000))
+    app.config['ARCHIVE_AFTER_DAYS'] = int(os.environ.get('ARCHIVE_AFTER_DAYS', 30)) # flask archive-items moves items ticked longer ago than this
+    app.config['TOMBSTONE_RETENTION_DAYS'] = int(os.environ.get('TOMBSTONE_RETENTION_DAYS', 30)) # Sync cursors older than this get a full snapshot
 
 
+    logging.basicConfig(level=app.config['LOG_LEVEL'], format='%(asctime)s %(levelname)s %(name)s %(message)s')
+
     db.init_app(app)
     migrate = Migrate(app, db)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login' # Route for login page
     jwt.init_app(app)
-    bcrypt.init_app(app)
+    response_cache.init_app(app)
+    fragment_cache.init_app(app)
+    static_assets.init_app(app)
+    response_compressor.init_app(app)
+    list_events.init_app(app)
+    password_hasher.init_app(app)
+    identity_cache.init_app(app)
+    instrumentation.init_app(app)
+    replica_router.init_app(app, db)
+    instrumentation.extra_stats['response_cache'] = response_cache.stats
+    instrumentation.extra_stats['fragment_cache'] = fragment_cache.stats
+    instrumentation.extra_stats['db_pools'] = replica_router.pool_stats
 
 
     from routes.auth_routes import auth_bp
@@ -40,6 +93,8 @@ def create_app():
     app.register_blueprint(auth_bp)
     app.register_blueprint(list_bp)
     app.register_blueprint(api_bp)
+    app.cli.add_command(archive_items_command)
+    app.cli.add_command(build_assets_command)
 
     return app
 
@@ -47,7 +102,15 @@ app = create_app()
 
 @login_manager.user_loader
 def load_user(user_id):
-    return models.User.query.get(int(user_id))
+    return identity_cache.get(int(user_id)) # A cached UserSnapshot, not a User instance
+
+@jwt.user_lookup_loader
+def load_jwt_user(jwt_header, jwt_data):
+    return load_api_user(jwt_header, jwt_data)
+
+@jwt.user_lookup_error_loader
+def jwt_user_not_found(jwt_header, jwt_data):
+    return jsonify({"msg": "User not found"}), 404
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
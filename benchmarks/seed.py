@@ -0,0 +1,88 @@
+"""Synthetic data generator for benchmarks.
+
+Fills an empty database with users, lists, participants and items using
+batched Core INSERTs with explicit ids, so large data sets load quickly and
+the shape of the data is reproducible from the random seed.
+"""
+import random
+from datetime import datetime, timedelta
+import bcrypt
+from sqlalchemy import insert
+from models import db, User, List, Item, ListParticipant
+
+BATCH_SIZE = 5000
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+def _insert_batched(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def seed_database(users=100, lists_per_user=3, items_per_list=50, participants_per_list=2,
+                  tick_ratio=0.3, password_rounds=4, seed=1):
+    """Insert a synthetic data set and return a summary of what was created.
+
+    Every user gets lists_per_user lists, each shared with participants_per_list
+    other users and holding items_per_list items, of which roughly tick_ratio
+    are ticked. All users share BENCHMARK_PASSWORD, hashed once at
+    password_rounds (rehashed to the app's cost on first login).
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    password_hash = bcrypt.hashpw(BENCHMARK_PASSWORD.encode('utf-8'), bcrypt.gensalt(password_rounds)).decode('utf-8')
+
+    _insert_batched(User, [
+        {'id': user_id, 'username': f'bench{user_id}', 'email': f'bench{user_id}@example.com', 'password_hash': password_hash}
+        for user_id in range(1, users + 1)
+    ])
+
+    counts = {'users': users, 'lists': 0, 'participants': 0, 'items': 0}
+    lists_by_user = {user_id: [] for user_id in range(1, users + 1)}
+    list_rows, participant_rows, item_rows = [], [], []
+
+    def flush():
+        # Parents first, so the inserts also work with enforced foreign keys
+        _insert_batched(List, list_rows)
+        _insert_batched(ListParticipant, participant_rows)
+        _insert_batched(Item, item_rows)
+        counts['lists'] += len(list_rows)
+        counts['participants'] += len(participant_rows)
+        counts['items'] += len(item_rows)
+        list_rows.clear()
+        participant_rows.clear()
+        item_rows.clear()
+
+    list_id = 0
+    for owner_id in range(1, users + 1):
+        for _ in range(lists_per_user):
+            list_id += 1
+            list_rows.append({'id': list_id, 'name': f'List {list_id}', 'created_by_id': owner_id,
+                              'created_at': now - timedelta(days=rng.randint(0, 365)), 'version': 1})
+            lists_by_user[owner_id].append(list_id)
+
+            members = [owner_id]
+            candidates = rng.sample(range(1, users + 1), min(participants_per_list + 1, users))
+            for participant_id in [user_id for user_id in candidates if user_id != owner_id][:participants_per_list]:
+                participant_rows.append({'list_id': list_id, 'user_id': participant_id, 'added_at': now})
+                lists_by_user[participant_id].append(list_id)
+                members.append(participant_id)
+
+            for position in range(items_per_list):
+                ticked = rng.random() < tick_ratio
+                item_rows.append({
+                    'name': f'Item {position}',
+                    'list_id': list_id,
+                    'added_by_id': rng.choice(members),
+                    'added_at': now,
+                    'is_ticked': ticked,
+                    'ticked_by_id': rng.choice(members) if ticked else None,
+                    'ticked_at': now if ticked else None,
+                })
+        if len(item_rows) >= BATCH_SIZE * 10: # Keep memory flat for large data sets
+            flush()
+    flush()
+    db.session.commit()
+
+    counts['lists_by_user'] = lists_by_user
+    return counts
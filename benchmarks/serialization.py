@@ -0,0 +1,98 @@
+"""Measure the per-item cost of serializing a large list.
+
+    python -m benchmarks.serialization                     # 10000 items, best of 5
+    python -m benchmarks.serialization --items 50000 --repeat 10
+
+Loading is timed two ways: ORM instances with their adder/ticker joined in
+(what the API used to build its payloads from) and the plain column rows of
+list_loader.item_query that it uses now. Encoding is timed for every backend
+installed: stdlib json always, orjson and MessagePack when available.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=10000, help='items in the benchmarked list')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement; the fastest one is reported')
+    return parser.parse_args(argv)
+
+
+def best_of(repeat, func):
+    # (fastest seconds, last result)
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def orm_item_data(item):
+    # The payload as it was built from ORM instances before services/serializers.py
+    return {
+        'id': item.id,
+        'name': item.name,
+        'is_ticked': item.is_ticked,
+        'added_by': item.added_by_user.username if item.added_by_user else None,
+        'added_at': str(item.added_at),
+        'ticked_by': item.ticked_by_user.username if item.ticked_by_user else None,
+        'ticked_at': str(item.ticked_at) if item.ticked_at else None,
+        'version': item.version,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='dbwe-bench-'), 'bench.db')
+    os.environ.setdefault('SECRET_KEY', 'benchmark-secret')
+    os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-jwt-secret-benchmark-jwt-secret')
+    from app import create_app
+    from sqlalchemy.orm import joinedload
+    from models import db, Item
+    from benchmarks.seed import seed_database
+    from services import serializers
+    from services.list_loader import item_query
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        seed_database(users=2, lists_per_user=1, items_per_list=args.items, participants_per_list=1)
+        db.session.commit()
+        list_id = 1
+
+        def load_orm():
+            db.session.expunge_all() # Time building the instances, not identity map hits
+            items = Item.query.filter_by(list_id=list_id).options(
+                joinedload(Item.added_by_user), joinedload(Item.ticked_by_user),
+            ).order_by(Item.id).all()
+            return [orm_item_data(item) for item in items]
+
+        def load_rows():
+            return [serializers.item_data(row) for row in item_query(list_id).order_by(Item.id)]
+
+        timings = [(name, *best_of(args.repeat, loader)) for name, loader in (('load: ORM instances', load_orm), ('load: column rows', load_rows))]
+        payload = {'items': timings[-1][2]}
+
+        encoders = [('encode: stdlib json', lambda: json.dumps(payload, separators=(',', ':')).encode())]
+        if serializers.orjson is not None:
+            encoders.append(('encode: orjson', lambda: serializers.dumps(payload).encode()))
+        if serializers.msgpack is not None:
+            encoders.append(('encode: msgpack', lambda: serializers.msgpack.packb(payload)))
+        timings += [(name, *best_of(args.repeat, encoder)) for name, encoder in encoders]
+
+    print(f'{args.items} items, best of {args.repeat}')
+    print(f'{"stage":<24}{"total ms":>10}{"us/item":>10}{"bytes/item":>12}')
+    print('-' * 56)
+    for name, seconds, result in timings:
+        size = f'{len(result) / args.items:.1f}' if isinstance(result, bytes) else ''
+        print(f'{name:<24}{seconds * 1000:>10.2f}{seconds * 1e6 / args.items:>10.2f}{size:>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
-from models import User
+from services.users import taken_fields
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, EmailField
-from wtforms.validators import DataRequired, Length, EqualTo, Email, ValidationError
+from wtforms.validators import DataRequired, Length, EqualTo, Email
 
 class RegistrationForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired(), Length(min=2, max=80)])
@@ -10,15 +10,23 @@ class RegistrationForm(FlaskForm):
     confirm_password = PasswordField('Confirm Password', validators=[DataRequired(), EqualTo('password')])
     submit = SubmitField('Register')
 
-    def validate_username(self, username):
-        user = User.query.filter_by(username=username.data).first()
-        if user:
-            raise ValidationError('That username is taken. Please choose a different one.')
+    # Messages for values that are already taken, by field
+    taken_messages = {
+        'username': 'That username is taken. Please choose a different one.',
+        'email': 'That email is already registered. Please use a different one.',
+    }
 
-    def validate_email(self, email):
-        user = User.query.filter_by(email=email.data).first()
-        if user:
-            raise ValidationError('That email is already registered. Please use a different one.')
+    def validate(self, extra_validators=None):
+        if not super().validate(extra_validators):
+            return False
+        # One query for both fields; the unique indexes still catch a race at commit time
+        taken = taken_fields(self.username.data, self.email.data)
+        for field in taken:
+            self.mark_taken(field)
+        return not taken
+
+    def mark_taken(self, field):
+        self[field].errors.append(self.taken_messages[field])
 
 class LoginForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired()])
@@ -0,0 +1,47 @@
+"""Add indexes for hot access paths and unique list participants
+
+Revision ID: 5cbed1cc4f0a
+Revises: 3aad4c904e20
+Create Date: 2026-10-18 09:12:41.503318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5cbed1cc4f0a'
+down_revision = '3aad4c904e20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Drop duplicate shares left over from before the unique constraint, keeping the oldest row.
+    # The derived table lets MySQL delete from the table it is selecting from.
+    op.execute(
+        'DELETE FROM list_participant WHERE id NOT IN ('
+        'SELECT id FROM (SELECT MIN(id) AS id FROM list_participant GROUP BY list_id, user_id) AS keep)'
+    )
+
+    with op.batch_alter_table('list', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_list_created_by_id'), ['created_by_id'], unique=False)
+
+    with op.batch_alter_table('item', schema=None) as batch_op:
+        batch_op.create_index('ix_item_list_id_is_ticked', ['list_id', 'is_ticked'], unique=False)
+
+    with op.batch_alter_table('list_participant', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_list_participant_list_id_user_id', ['list_id', 'user_id'])
+        batch_op.create_index('ix_list_participant_user_id', ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('list_participant', schema=None) as batch_op:
+        batch_op.drop_index('ix_list_participant_user_id')
+        batch_op.drop_constraint('uq_list_participant_list_id_user_id', type_='unique')
+
+    with op.batch_alter_table('item', schema=None) as batch_op:
+        batch_op.drop_index('ix_item_list_id_is_ticked')
+
+    with op.batch_alter_table('list', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_list_created_by_id'))
@@ -0,0 +1,85 @@
+"""Cascade deletes in the database
+
+Revision ID: 7d3a5f8e2b64
+Revises: 1f417d2b1dc1
+Create Date: 2026-10-18 12:58:41.603297
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3a5f8e2b64'
+down_revision = '1f417d2b1dc1'
+branch_labels = None
+depends_on = None
+
+# (table, column, referred table, ON DELETE)
+FOREIGN_KEYS = [
+    ('list', 'created_by_id', 'user', 'CASCADE'),
+    ('list_participant', 'list_id', 'list', 'CASCADE'),
+    ('list_participant', 'user_id', 'user', 'CASCADE'),
+    ('item', 'list_id', 'list', 'CASCADE'),
+    ('item', 'added_by_id', 'user', 'SET NULL'),
+    ('item', 'ticked_by_id', 'user', 'SET NULL'),
+    ('item_archive', 'list_id', 'list', 'CASCADE'),
+    ('item_archive', 'added_by_id', 'user', 'SET NULL'),
+    ('item_archive', 'ticked_by_id', 'user', 'SET NULL'),
+]
+# SET NULL needs a nullable column; these were NOT NULL
+NULLABLE_ON_DELETE = [('item', 'added_by_id'), ('item_archive', 'added_by_id')]
+FK_NAMING = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _fk_name(table, column, referred):
+    return f'fk_{table}_{column}_{referred}'
+
+
+def _replace_foreign_keys(upgrading):
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table in dict.fromkeys(table for table, _, _, _ in FOREIGN_KEYS):
+        existing = {tuple(fk['constrained_columns']): fk['name'] for fk in inspector.get_foreign_keys(table)}
+        # SQLite foreign keys are unnamed; the naming convention lets batch mode address them
+        with op.batch_alter_table(table, naming_convention=FK_NAMING) as batch_op:
+            for fk_table, column, referred, ondelete in FOREIGN_KEYS:
+                if fk_table != table:
+                    continue
+                batch_op.drop_constraint(existing.get((column,)) or _fk_name(table, column, referred), type_='foreignkey')
+                if (table, column) in NULLABLE_ON_DELETE:
+                    batch_op.alter_column(column, existing_type=sa.Integer(), nullable=upgrading)
+                batch_op.create_foreign_key(
+                    _fk_name(table, column, referred), referred, [column], ['id'],
+                    ondelete=ondelete if upgrading else None,
+                )
+    if bind.dialect.name == 'sqlite':
+        _recreate_search_triggers()
+
+
+def _recreate_search_triggers():
+    # Rebuilding item and list dropped the FTS triggers from the search migration (9b1e4d2a7c31)
+    for table in ('list', 'item'):
+        fts = f'{table}_fts'
+        if not sa.inspect(op.get_bind()).has_table(fts):
+            continue
+        for trigger in ('insert', 'delete', 'update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {fts}_{trigger}')
+        op.execute(f'CREATE TRIGGER {fts}_insert AFTER INSERT ON "{table}" BEGIN '
+                   f'INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END')
+        op.execute(f'CREATE TRIGGER {fts}_delete AFTER DELETE ON "{table}" BEGIN '
+                   f"INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name); END")
+        op.execute(f'CREATE TRIGGER {fts}_update AFTER UPDATE OF name ON "{table}" BEGIN '
+                   f"INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name); "
+                   f'INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END')
+
+
+def upgrade():
+    _replace_foreign_keys(upgrading=True)
+
+
+def downgrade():
+    # Rows whose adder was deleted cannot go back to NOT NULL; they go with their user's data
+    for table, column in NULLABLE_ON_DELETE:
+        op.execute(f'DELETE FROM {table} WHERE {column} IS NULL')
+    _replace_foreign_keys(upgrading=False)
@@ -0,0 +1,52 @@
+"""Add full-text search over list and item names
+
+Revision ID: 9b1e4d2a7c31
+Revises: f3c6486b2796
+Create Date: 2026-10-18 11:40:05.218833
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b1e4d2a7c31'
+down_revision = 'f3c6486b2796'
+branch_labels = None
+depends_on = None
+
+SEARCHABLE_TABLES = ('list', 'item')
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # External-content FTS5 tables: the index lives in <table>_fts, the text stays in <table>
+        for table in SEARCHABLE_TABLES:
+            fts = f'{table}_fts'
+            op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5(name, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+            op.execute(f'CREATE TRIGGER {fts}_insert AFTER INSERT ON "{table}" BEGIN '
+                       f'INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END')
+            op.execute(f'CREATE TRIGGER {fts}_delete AFTER DELETE ON "{table}" BEGIN '
+                       f"INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name); END")
+            op.execute(f'CREATE TRIGGER {fts}_update AFTER UPDATE OF name ON "{table}" BEGIN '
+                       f"INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name); "
+                       f'INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END')
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    elif dialect in ('mysql', 'mariadb'):
+        for table in SEARCHABLE_TABLES:
+            op.create_index(f'ft_{table}_name', table, ['name'], mysql_prefix='FULLTEXT')
+    # Other databases fall back to LIKE scans (services/search.py)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for table in SEARCHABLE_TABLES:
+            fts = f'{table}_fts'
+            for trigger in ('insert', 'delete', 'update'):
+                op.execute(f'DROP TRIGGER IF EXISTS {fts}_{trigger}')
+            op.execute(f'DROP TABLE IF EXISTS {fts}')
+    elif dialect in ('mysql', 'mariadb'):
+        for table in SEARCHABLE_TABLES:
+            op.drop_index(f'ft_{table}_name', table_name=table)
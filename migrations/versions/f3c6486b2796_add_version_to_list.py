@@ -0,0 +1,26 @@
+"""Add version column to list
+
+Revision ID: f3c6486b2796
+Revises: 5cbed1cc4f0a
+Create Date: 2026-10-18 10:02:17.118094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c6486b2796'
+down_revision = '5cbed1cc4f0a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('list', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('list', schema=None) as batch_op:
+        batch_op.drop_column('version')
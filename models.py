@@ -1,18 +1,33 @@
+import sqlite3
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from services.db_routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession}) # Reads can go to a replica, see services/db_routing.py
+
+
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite only enforces foreign keys, and so ON DELETE, when asked to on each connection
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
 
-db = SQLAlchemy()
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(128), nullable=False)
-    lists_created = db.relationship('List', backref='creator', lazy=True, cascade="all, delete-orphan")
-    lists_participated = db.relationship('ListParticipant', backref='participant', lazy=True, cascade="all, delete-orphan")
-    items_added = db.relationship('Item', backref='added_by_user', lazy=True, foreign_keys='[Item.added_by_id]')
-    items_ticked = db.relationship('Item', backref='ticked_by_user', lazy=True, foreign_keys='[Item.ticked_by_id]')
+    # passive_deletes: deleting a user is one DELETE; the foreign keys' ON DELETE handles the rest
+    lists_created = db.relationship('List', backref='creator', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    lists_participated = db.relationship('ListParticipant', backref='participant', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    items_added = db.relationship('Item', backref='added_by_user', lazy=True, foreign_keys='[Item.added_by_id]', passive_deletes=True)
+    items_ticked = db.relationship('Item', backref='ticked_by_user', lazy=True, foreign_keys='[Item.ticked_by_id]', passive_deletes=True)
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -20,31 +35,79 @@ class User(UserMixin, db.Model):
 class List(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
-    created_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    created_by_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    items = db.relationship('Item', backref='list', lazy=True, cascade="all, delete-orphan") # Cascade for deleting items when list is deleted
-    participants = db.relationship('ListParticipant', backref='list', lazy=True, cascade="all, delete-orphan") # Cascade for participants
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1') # Bumped on every item/participant change, used for ETags
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # Set with every version bump
+    # Deleting a list is one DELETE; ON DELETE CASCADE removes its items, participants and archive
+    items = db.relationship('Item', backref='list', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    participants = db.relationship('ListParticipant', backref='list', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    archived_items = db.relationship('ItemArchive', backref='list', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self):
         return f'<List {self.name}>'
 
 class Item(db.Model):
+    __table_args__ = (
+        db.Index('ix_item_list_id_is_ticked', 'list_id', 'is_ticked'), # Also serves plain list_id lookups
+        db.Index('ix_item_list_id_updated_at', 'list_id', 'updated_at'), # Delta sync (services/delta_sync.py)
+        db.Index('ix_item_is_ticked_ticked_at', 'is_ticked', 'ticked_at'), # Archive batches (services/archive.py)
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
-    list_id = db.Column(db.Integer, db.ForeignKey('list.id'), nullable=False)
-    added_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    list_id = db.Column(db.Integer, db.ForeignKey('list.id', ondelete='CASCADE'), nullable=False)
+    added_by_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True) # NULL once the adder's account is deleted
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_ticked = db.Column(db.Boolean, default=False)
-    ticked_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    ticked_by_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
     ticked_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # Also set by bulk UPDATEs
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1') # Bumped by every tick/untick/rename; conditional ticks compare it
 
     def __repr__(self):
         return f'<Item {self.name}>'
 
+class ItemTombstone(db.Model):
+    # Left behind when an item is deleted or archived, so delta sync can report the removal
+    __table_args__ = (
+        db.Index('ix_item_tombstone_list_id_deleted_at', 'list_id', 'deleted_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, nullable=False)
+    list_id = db.Column(db.Integer, db.ForeignKey('list.id', ondelete='CASCADE'), nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ItemTombstone Item_id:{self.item_id}>'
+
+class ItemArchive(db.Model):
+    # Ticked items moved out of item by the archive job (services/archive.py), so active lists stay small
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, nullable=False) # id the item had in item
+    name = db.Column(db.String(120), nullable=False)
+    list_id = db.Column(db.Integer, db.ForeignKey('list.id', ondelete='CASCADE'), nullable=False, index=True)
+    added_by_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    added_at = db.Column(db.DateTime)
+    ticked_by_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    ticked_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    added_by_user = db.relationship('User', foreign_keys=[added_by_id])
+    ticked_by_user = db.relationship('User', foreign_keys=[ticked_by_id])
+
+    def __repr__(self):
+        return f'<ItemArchive {self.name}>'
+
 class ListParticipant(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('list_id', 'user_id', name='uq_list_participant_list_id_user_id'), # A user participates in a list at most once
+        db.Index('ix_list_participant_user_id', 'user_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    list_id = db.Column(db.Integer, db.ForeignKey('list.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    list_id = db.Column(db.Integer, db.ForeignKey('list.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
@@ -1,11 +1,42 @@
-from flask import Blueprint, request, jsonify
-from models import User, List, ListParticipant
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from flask_bcrypt import check_password_hash, generate_password_hash
+from flask import Blueprint, Response, request, jsonify, stream_with_context, abort
+from models import User, List
+from flask_jwt_extended import create_access_token, jwt_required
 from models import db
+from services.list_loader import can_view_list
+from services.export import EXPORT_FORMATS, export_ndjson, export_csv
+from services.pagination import page_args, keyset_page
+from services.list_stats import list_stats
+from services.delta_sync import item_changes
+from services.conditional import visible_list_version, list_etag, is_not_modified, not_modified, with_etag
+from services.list_cache import list_summary, item_page, archived_item_page, user_list_page
+from services.archive import wants_archived
+from services.db_routing import replica_reads
+from services.list_changes import user_changed
+from services.item_batch import apply_item_batch, MAX_BATCH_OPERATIONS
+from services.item_ticks import set_ticked
+from services.passwords import password_hasher, HashingBusy
+from services.identity import current_api_user, identity_cache
+from services.search import search, autocomplete_usernames
+from services.users import DUPLICATE_MESSAGES, MAX_IMPORT_USERS, MAX_IMPORT_PASSWORDS, duplicate_field, import_users, plain_password_count
+from services.serializers import user_data, response_format
+from sqlalchemy.exc import IntegrityError
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+
+@api_bp.errorhandler(HashingBusy)
+def hashing_busy(error):
+    response = jsonify({"msg": error.description})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+def list_not_visible(list_id):
+    # visible_list_version found nothing: a missing list is a 404, someone else's a 403
+    if db.session.get(List, list_id) is None:
+        abort(404)
+    return jsonify({"msg": "Not authorized to view this list"}), 403
+
 @api_bp.route('/token', methods=['POST'])
 def create_token():
     username = request.json.get('username')
@@ -13,29 +44,27 @@ def create_token():
 
     user = User.query.filter_by(username=username).first()
 
-    if not user or not check_password_hash(user.password_hash, password.encode('utf-8')):
+    if not user or not password or not password_hasher.check(user.password_hash, password):
         return jsonify({"msg": "Bad username or password"}), 401
 
-    access_token = create_access_token(identity=username, fresh=True)
+    if password_hasher.needs_rehash(user.password_hash): # Cost setting changed since the hash was made
+        user.password_hash = password_hasher.hash(password)
+        db.session.commit()
+
+    access_token = create_access_token(identity=str(user.id), fresh=True) # The id never changes, so requests resolve it without a username lookup
 
     return jsonify(access_token=access_token, token_type='bearer', expires_in=3600), 200
 
 
 @api_bp.route('/users', methods=['GET', 'POST'])
 @jwt_required()
+@replica_reads
 def users_api():
     if request.method == 'GET':
-        # Get all users
-        users = User.query.all()
-        user_list = []
-        for user in users:
-            user_data = {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email
-            }
-            user_list.append(user_data)
-        return jsonify(users=user_list), 200
+        # Get one page of users, keyed on id
+        limit, cursor = page_args()
+        users, next_cursor = keyset_page(db.session.query(User.id, User.username, User.email), User.id, limit, cursor)
+        return jsonify(users=[user_data(row) for row in users], next_cursor=next_cursor), 200
 
     elif request.method == 'POST':
         # Create a new user
@@ -46,23 +75,53 @@ def users_api():
         if not username or not email or not password:
             return jsonify({"msg": "Username, email, and password are required"}), 400
 
-        existing_user_username = User.query.filter_by(username=username).first()
-        if existing_user_username:
-            return jsonify({"msg": "Username already exists"}), 400
-
-        existing_user_email = User.query.filter_by(email=email).first()
-        if existing_user_email:
-            return jsonify({"msg": "Email already registered"}), 400
-
-
-        hashed_password = generate_password_hash(password.encode('utf-8')).decode('utf-8')
+        hashed_password = password_hasher.hash(password)
         new_user = User(username=username, email=email, password_hash=hashed_password)
         db.session.add(new_user)
-        db.session.commit()
+        try:
+            db.session.commit() # The unique indexes on username and email decide, without a race window
+        except IntegrityError as e:
+            db.session.rollback()
+            field = duplicate_field(e)
+            if field is None:
+                raise
+            return jsonify({"msg": DUPLICATE_MESSAGES[field]}), 400
 
         return jsonify({"msg": "User created successfully", "user_id": new_user.id}), 201
 
 
+@api_bp.route('/users/autocomplete', methods=['GET'])
+@jwt_required()
+def autocomplete_users():
+    # Usernames starting with ?q=, for picking whom to share a list with
+    return jsonify(usernames=autocomplete_usernames(request.args.get('q', '')))
+
+
+@api_bp.route('/users/import', methods=['POST'])
+@jwt_required()
+def import_users_api():
+    data = request.get_json(silent=True)
+    users = data.get('users') if isinstance(data, dict) else None
+    if not isinstance(users, list) or not users:
+        return jsonify({"msg": "A non-empty users array is required"}), 400
+    if len(users) > MAX_IMPORT_USERS:
+        return jsonify({"msg": f"At most {MAX_IMPORT_USERS} users per import"}), 400
+    if plain_password_count(users) > MAX_IMPORT_PASSWORDS:
+        return jsonify({"msg": f"At most {MAX_IMPORT_PASSWORDS} plain passwords per import; send bcrypt password_hash values for the rest"}), 400
+
+    try:
+        results, ok = import_users(users)
+    except IntegrityError as e: # Someone else took one of the names while the import was running
+        db.session.rollback()
+        field = duplicate_field(e)
+        if field is None:
+            raise
+        return jsonify({"msg": DUPLICATE_MESSAGES[field]}), 409
+    if not ok:
+        return jsonify(results=results), 400
+    return jsonify({"msg": "Users imported successfully", "created": len(results)}), 201
+
+
 @api_bp.route('/users/<int:id>', methods=['GET', 'DELETE', 'PUT', 'PATCH'])
 @jwt_required()
 def user_api_by_id(id):
@@ -72,17 +131,14 @@ def user_api_by_id(id):
 
     if request.method == 'GET':
         # Get specific user by ID
-        user_data = {
-            'id': user.id,
-            'username': user.username,
-            'email': user.email
-        }
-        return jsonify(user=user_data), 200
+        return jsonify(user=user_data(user)), 200
 
     elif request.method == 'DELETE':
         # Delete user by ID
+        user_changed(user.id) # Their lists, shares and name are spread over many cached payloads
         db.session.delete(user)
         db.session.commit()
+        identity_cache.forget(id)
         return jsonify({"msg": "User deleted successfully"}), 200
 
     elif request.method in ['PUT', 'PATCH']: # PUT for full update, PATCH for partial
@@ -92,82 +148,195 @@ def user_api_by_id(id):
         password = request.json.get('password')
 
 
-        if username:
-            existing_user_username = User.query.filter_by(username=username).first()
-            if existing_user_username and existing_user_username.id != user.id: # Check if username exists for *another* user
-                return jsonify({"msg": "Username already exists"}), 400
+        if username and username != user.username:
+            user_changed(user.id) # Usernames are embedded in list payloads and their ETags' versions
             user.username = username
 
         if email:
-            existing_user_email = User.query.filter_by(email=email).first()
-            if existing_user_email and existing_user_email.id != user.id: # Check if email exists for *another* user
-                return jsonify({"msg": "Email already registered"}), 400
             user.email = email
 
         if password: # Only update password if a new password is provided
-            hashed_password = generate_password_hash(password.encode('utf-8')).decode('utf-8')
+            hashed_password = password_hasher.hash(password)
             user.password_hash = hashed_password
 
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e: # Username or email belongs to another user
+            db.session.rollback()
+            field = duplicate_field(e)
+            if field is None:
+                raise
+            return jsonify({"msg": DUPLICATE_MESSAGES[field]}), 400
+
+        identity_cache.forget(user.id)
         return jsonify({"msg": "User updated successfully", "user_id": user.id}), 200
 
 
 @api_bp.route('/list', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_lists():
-    current_user_username = get_jwt_identity()
-    user = User.query.filter_by(username=current_user_username).first()
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
-
-    created_lists = List.query.filter_by(created_by_id=user.id).all()
-    participated_lists = [participant.list for participant in ListParticipant.query.filter_by(user_id=user.id).all()]
+    user = current_api_user
 
-    lists_data = []
-    for lst in created_lists + participated_lists: # Combine lists
-        list_data = {
-            'id': lst.id,
-            'name': lst.name,
-            'created_by': lst.creator.username,
-            'created_at': str(lst.created_at),
-            'is_creator': lst.created_by_id == user.id # Flag if current user is the creator
-        }
-        lists_data.append(list_data)
+    limit, cursor = page_args()
+    lists_data, next_cursor = user_list_page(user.id, limit, cursor)
 
-    return jsonify(lists=lists_data)
+    return jsonify(lists=lists_data, next_cursor=next_cursor)
 
 
 @api_bp.route('/list/<int:list_id>', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_list_detail(list_id):
-    current_user_username = get_jwt_identity()
-    user = User.query.filter_by(username=current_user_username).first()
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
+    user = current_api_user
 
-    lst = List.query.get_or_404(list_id)
-    if lst.created_by_id != user.id and not ListParticipant.query.filter_by(list_id=list_id, user_id=user.id).first():
-        return jsonify({"msg": "Not authorized to view this list"}), 403
+    # The version is read from the database, so an unchanged list is answered
+    # (or 304'd) with this one indexed lookup and bodies cached under it
+    version = visible_list_version(list_id, user.id)
+    if version is None:
+        return list_not_visible(list_id)
+
+    limit, cursor = page_args()
+    include_archived = wants_archived()
+    etag = list_etag(list_id, version, user.id, limit, cursor, include_archived, response_format())
+    if is_not_modified(etag):
+        return not_modified(etag)
 
-    items_data = []
-    for item in lst.items:
-        items_data.append({
-            'id': item.id,
-            'name': item.name,
-            'is_ticked': item.is_ticked,
-            'added_by': item.added_by_user.username,
-            'added_at': str(item.added_at),
-            'ticked_by': item.ticked_by_user.username if item.ticked_by_user else None,
-            'ticked_at': str(item.ticked_at) if item.ticked_at else None
-        })
+    summary = list_summary(list_id, version)
+    if summary is None: # Deleted since the version was read
+        abort(404)
+    items_data, next_cursor = item_page(list_id, version, limit, cursor)
 
     list_detail_data = {
-        'id': lst.id,
-        'name': lst.name,
-        'created_by': lst.creator.username,
-        'created_at': str(lst.created_at),
+        'id': summary['id'],
+        'name': summary['name'],
+        'created_by': summary['created_by'],
+        'created_at': summary['created_at'],
         'items': items_data,
-        'is_creator': lst.created_by_id == user.id # Flag for creator
+        'is_creator': summary['created_by_id'] == user.id # Flag for creator
     }
 
-    return jsonify(list_detail=list_detail_data)
\ No newline at end of file
+    if include_archived:
+        # The most recently archived items; /history pages through the rest
+        list_detail_data['archived_items'], list_detail_data['archived_next_cursor'] = archived_item_page(list_id, version, limit, None)
+
+    response = jsonify(list_detail=list_detail_data, next_cursor=next_cursor)
+    return with_etag(response, etag)
+
+
+@api_bp.route('/list/<int:list_id>/changes', methods=['GET'])
+@jwt_required()
+def get_list_changes(list_id):
+    # Items added, ticked, renamed or removed since ?since=<cursor from the previous call>
+    user = current_api_user
+
+    version = visible_list_version(list_id, user.id) # The only query when nothing changed
+    if version is None:
+        return list_not_visible(list_id)
+
+    try:
+        changes = item_changes(list_id, version, request.args.get('since'))
+    except ValueError:
+        return jsonify({"msg": "Invalid since cursor"}), 400
+    return jsonify(changes)
+
+
+@api_bp.route('/list/<int:list_id>/history', methods=['GET'])
+@jwt_required()
+def get_list_history(list_id):
+    # Archived items of a list, most recently archived first
+    user = current_api_user
+
+    version = visible_list_version(list_id, user.id)
+    if version is None:
+        return list_not_visible(list_id)
+
+    limit, cursor = page_args()
+    etag = list_etag(list_id, version, user.id, 'history', limit, cursor, response_format())
+    if is_not_modified(etag):
+        return not_modified(etag)
+
+    archived_items, next_cursor = archived_item_page(list_id, version, limit, cursor)
+    return with_etag(jsonify(archived_items=archived_items, next_cursor=next_cursor), etag)
+
+
+@api_bp.route('/list/<int:list_id>/stats', methods=['GET'])
+@jwt_required()
+def get_list_stats(list_id):
+    user = current_api_user
+
+    lst = List.query.get_or_404(list_id)
+    if not can_view_list(lst, user.id):
+        return jsonify({"msg": "Not authorized to view this list"}), 403
+
+    return jsonify(stats=list_stats(lst.id))
+
+@api_bp.route('/list/<int:list_id>/items/batch', methods=['POST'])
+@jwt_required()
+def batch_items(list_id):
+    user = current_api_user
+
+    lst = List.query.get_or_404(list_id)
+    if not can_view_list(lst, user.id):
+        return jsonify({"msg": "Not authorized to modify this list"}), 403
+
+    data = request.get_json(silent=True)
+    operations = data.get('operations') if isinstance(data, dict) else None # A JSON array or string body has no operations
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"msg": "A non-empty operations array is required"}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({"msg": f"At most {MAX_BATCH_OPERATIONS} operations per batch"}), 400
+
+    results, ok = apply_item_batch(lst.id, user, operations)
+    return jsonify(results=results), 200 if ok else 400
+
+@api_bp.route('/list/<int:list_id>/items/<int:item_id>/tick', methods=['PUT'])
+@jwt_required()
+def tick_item(list_id, item_id):
+    # Body: {"is_ticked": true|false, "version": <optional, the item version last seen>}
+    user = current_api_user
+
+    if visible_list_version(list_id, user.id) is None:
+        return list_not_visible(list_id)
+
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {} # No body: tick, without a version check
+    ticked = data.get('is_ticked', True) if isinstance(data, dict) else None # A JSON array or string is a 400 below
+    version = data.get('version') if isinstance(data, dict) else None
+    if not isinstance(ticked, bool) or (version is not None and (not isinstance(version, int) or isinstance(version, bool))):
+        return jsonify({"msg": "is_ticked must be a boolean and version an integer"}), 400
+
+    status, state = set_ticked(list_id, item_id, user, ticked, version)
+    if status == 'not_found':
+        abort(404)
+    if status == 'conflict':
+        return jsonify(item=state, msg="Item was changed since that version"), 409
+    return jsonify(item=state)
+
+@api_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_api():
+    # Lists and items matching every word of ?q=, best match first
+    user = current_api_user
+
+    limit, cursor = page_args()
+    results, next_cursor = search.search(user.id, request.args.get('q', ''), limit, cursor)
+    return jsonify(results=results, next_cursor=next_cursor)
+
+@api_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_lists():
+    user = current_api_user
+
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"msg": "Unsupported export format"}), 400
+
+    # Rows are produced while the response is being sent, so keep the app context alive for the generator
+    if export_format == 'csv':
+        body = stream_with_context(export_csv(user.id))
+    else:
+        body = stream_with_context(export_ndjson(user.id))
+    return Response(body, mimetype=EXPORT_FORMATS[export_format],
+                    headers={'Content-Disposition': f'attachment; filename=lists.{export_format}'})
\ No newline at end of file
@@ -2,7 +2,9 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request
 from forms import RegistrationForm, LoginForm
 from models import db, User
 from flask_login import login_user, current_user, logout_user
-from flask_bcrypt import generate_password_hash, check_password_hash
+from services.passwords import password_hasher
+from services.users import duplicate_field
+from sqlalchemy.exc import IntegrityError
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -13,10 +15,18 @@ def register():
 
     form = RegistrationForm()
     if form.validate_on_submit():
-        hashed_password = generate_password_hash(form.password.data.encode('utf-8'))
-        user = User(username=form.username.data, email=form.email.data, password_hash=hashed_password.decode('utf-8'))
+        hashed_password = password_hasher.hash(form.password.data)
+        user = User(username=form.username.data, email=form.email.data, password_hash=hashed_password)
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e: # Taken between the form check and the insert
+            db.session.rollback()
+            field = duplicate_field(e)
+            if field is None:
+                raise
+            form.mark_taken(field)
+            return render_template('register.html', title='Register', form=form)
         flash('Your account has been created! You are now able to log in', 'success')
         return redirect(url_for('auth.login'))
     return render_template('register.html', title='Register', form=form)
@@ -34,8 +44,11 @@ def login():
         user = User.query.filter_by(username=username).first()
 
         if user:
-            password_check_result = check_password_hash(user.password_hash, password.encode('utf-8'))
+            password_check_result = password_hasher.check(user.password_hash, password)
             if password_check_result:
+                if password_hasher.needs_rehash(user.password_hash): # Cost setting changed since the hash was made
+                    user.password_hash = password_hasher.hash(password)
+                    db.session.commit()
                 login_user(user)
                 flash('Login successful.', 'success')
                 next_page = request.args.get('next')
@@ -1,20 +1,47 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+import logging
+from flask import Blueprint, Response, render_template, redirect, url_for, flash, request, session, make_response, jsonify, abort
 from forms import CreateListForm, AddItemForm, ShareListForm
 from models import db, List, Item, ListParticipant, User
 from flask_login import login_required, current_user
-from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from services.list_loader import load_list_detail, can_view_list
+from services.list_stats import list_stats, tick_counts
+from services.list_changes import list_changed, list_index_changed, list_deleted
+from services.list_cache import dashboard, archived_item_page
+from services.archive import wants_archived
+from services.db_routing import replica_reads
+from services.pagination import page_args
+from services.search import search, autocomplete_usernames
+from services.list_events import list_events, item_added
+from services.item_ticks import set_ticked
+from services.conditional import visible_list_version, list_etag, csrf_window, is_not_modified, not_modified, with_etag
 
 list_bp = Blueprint('list', __name__)
+logger = logging.getLogger(__name__)
+
+ARCHIVED_ITEMS_SHOWN = 100 # On list_detail?include_archived=1; the API history endpoint pages through all of them
 
 @list_bp.route('/')
 @login_required
+@replica_reads
 def index():
-    created_lists = List.query.filter_by(created_by_id=current_user.id).all()
-    participated_lists = []
-    participant_records = ListParticipant.query.filter_by(user_id=current_user.id).all()
-    for record in participant_records:
-        participated_lists.append(record.list)
-    return render_template('index.html', created_lists=created_lists, participated_lists=participated_lists, title='Dashboard')
+    lists = dashboard(current_user.id)
+    return render_template('index.html', created_lists=lists['created_lists'], participated_lists=lists['participated_lists'], title='Dashboard')
+
+@list_bp.route('/search')
+@login_required
+def search_lists():
+    query = request.args.get('q', '')
+    limit, cursor = page_args()
+    results, next_cursor = search.search(current_user.id, query, limit, cursor)
+    return render_template('search.html', query=query, results=results, next_cursor=next_cursor, title='Search')
+
+@list_bp.route('/users/autocomplete')
+@login_required
+def autocomplete_users():
+    # Suggestions for the share form's username field
+    return jsonify(usernames=autocomplete_usernames(request.args.get('q', '')))
 
 @list_bp.route('/create_list', methods=['GET', 'POST'])
 @login_required
@@ -23,6 +50,7 @@ def create_list():
     if form.validate_on_submit():
         list_item = List(name=form.name.data, created_by_id=current_user.id)
         db.session.add(list_item)
+        list_index_changed(current_user.id)
         db.session.commit()
         flash('Your list has been created!', 'success')
         return redirect(url_for('list.index'))
@@ -33,11 +61,13 @@ def create_list():
 def delete_list(list_id):
     list_obj = List.query.get_or_404(list_id)
 
-    if list_obj.creator != current_user:
+    if list_obj.created_by_id != current_user.id:
         flash("You are not authorized to delete this list.", 'danger')
         return redirect(url_for('list.list_detail', list_id=list_id))
 
-    db.session.delete(list_obj)
+    participant_ids = db.session.scalars(select(ListParticipant.user_id).where(ListParticipant.list_id == list_id)).all()
+    list_deleted(list_obj.id, [list_obj.created_by_id, *participant_ids])
+    db.session.delete(list_obj) # Items, participants and archived items go with it via ON DELETE CASCADE
     db.session.commit()
     flash(f'List "{list_obj.name}" has been deleted.', 'success')
     return redirect(url_for('list.index'))
@@ -45,76 +75,107 @@ def delete_list(list_id):
 @list_bp.route('/list/<int:list_id>', methods=['GET', 'POST'])
 @login_required
 def list_detail(list_id):
-    list_obj = List.query.get_or_404(list_id)
-    if list_obj.created_by_id != current_user.id and not ListParticipant.query.filter_by(list_id=list_id, user_id=current_user.id).first():
+    if request.method == 'GET' and request.if_none_match:
+        # Unchanged list: answer from the version alone, before any rows are loaded
+        version = visible_list_version(list_id, current_user.id)
+        if version is not None:
+            etag = list_detail_etag(list_id, version)
+            if is_not_modified(etag):
+                return not_modified(etag)
+
+    list_obj = load_list_detail(list_id) # Items are only queried if the page renders them
+    if not can_view_list(list_obj, current_user.id):
         flash("You don't have permission to view this list.", 'danger')
         return redirect(url_for('list.index'))
-    
-    # Adding logging for troubleshooting
+
     add_item_form = AddItemForm()
     share_form = ShareListForm()
 
-    print("Entering list_detail function for list_id:", list_id)
-
     if request.method == 'POST':
-        print("Request method is POST")
+        # The page's own script posts with Accept: application/json and gets JSON back instead of a redirect
+        wants_json = request.accept_mimetypes.best == 'application/json'
 
         if 'name' in request.form:
-            print(" 'name' field is in request.form")
             if add_item_form.validate_on_submit():
-                print("  add_item_form is valid")
                 item = Item(name=add_item_form.name.data, list_id=list_obj.id, added_by_id=current_user.id)
-                print("  Item object created:", item)
                 db.session.add(item)
-                print("  Item added to session")
+                db.session.flush() # Assigns item.id for the event
+                event = item_added(item, current_user.username)
+                list_changed(list_obj.id, event)
                 db.session.commit()
-                print("  Session committed")
+                logger.debug('item added list_id=%s item_id=%s user_id=%s', list_id, item.id, current_user.id)
+                if wants_json:
+                    return jsonify(item=event), 201
                 flash('Item added to list!', 'success')
-                print("  Flash message set, redirecting...")
                 return redirect(url_for('list.list_detail', list_id=list_id))
             else:
-                print("  add_item_form is NOT valid. Errors:", add_item_form.errors)
-        else:
-            print(" 'name' field is NOT in request.form") 
+                logger.debug('add item rejected list_id=%s errors=%s', list_id, add_item_form.errors)
+                if wants_json:
+                    return jsonify(errors=add_item_form.errors), 400
 
         if 'username' in request.form and share_form.validate_on_submit():
             user_to_share = User.query.filter_by(username=share_form.username.data).first()
             if not user_to_share:
                 flash('User not found.', 'danger')
-            elif ListParticipant.query.filter_by(list_id=list_id, user_id=user_to_share.id).first():
-                flash('User is already participating in this list.', 'info')
             else:
                 participant = ListParticipant(list_id=list_id, user_id=user_to_share.id)
                 db.session.add(participant)
-                db.session.commit()
-                flash(f'List shared with {share_form.username.data}!', 'success')
+                try:
+                    list_changed(list_id)
+                    list_index_changed(user_to_share.id)
+                    db.session.commit()
+                    flash(f'List shared with {share_form.username.data}!', 'success')
+                except IntegrityError: # uq_list_participant_list_id_user_id
+                    db.session.rollback()
+                    flash('User is already participating in this list.', 'info')
             return redirect(url_for('list.list_detail', list_id=list_id))
 
 
         if 'tick_item' in request.form:
-            item_id_to_tick = request.form['tick_item']
-            item_to_tick = Item.query.get_or_404(item_id_to_tick)
-            if item_to_tick.list_id == list_id:
-                if item_to_tick.is_ticked:
-                    item_to_tick.is_ticked = False
-                    item_to_tick.ticked_by_id = None
-                    item_to_tick.ticked_at = None
-                    flash(f'Item "{item_to_tick.name}" unticked.', 'info')
-                else:
-                    item_to_tick.is_ticked = True
-                    item_to_tick.ticked_by_id = current_user.id
-                    item_to_tick.ticked_at = datetime.utcnow()
-                    flash(f'Item "{item_to_tick.name}" ticked off!', 'success')
-                db.session.commit()
+            # The checkbox posts the state it was changed to, and the item version the page last saw
+            status, state = set_ticked(
+                list_id, request.form.get('tick_item', type=int), current_user,
+                ticked=request.form.get('is_ticked') == 'true', version=request.form.get('version', type=int),
+            )
+            if status == 'not_found':
+                abort(404)
+            if wants_json:
+                if status == 'conflict':
+                    return jsonify(item=state, msg='Item was changed by someone else'), 409
+                return jsonify(item=state)
+            if status == 'ok':
+                flash(f'Item "{state["name"]}" ticked off!' if state['is_ticked'] else f'Item "{state["name"]}" unticked.', 'success' if state['is_ticked'] else 'info')
+            elif status == 'conflict':
+                flash(f'Item "{state["name"]}" was changed by someone else; check it again.', 'warning')
             return redirect(url_for('list.list_detail', list_id=list_id))
 
 
-    tick_counts = {}
-    for item in list_obj.items:
-        if item.is_ticked and item.ticked_by_user:
-            if item.ticked_by_user.username in tick_counts:
-                tick_counts[item.ticked_by_user.username] += 1
-            else:
-                tick_counts[item.ticked_by_user.username] = 1
+    stats = list_stats(list_id)
+    archived_items = archived_next_cursor = None
+    if wants_archived():
+        archived_items, archived_next_cursor = archived_item_page(list_id, list_obj.version, ARCHIVED_ITEMS_SHOWN, None)
+    # Re-rendered form errors and flash messages are one-off pages, not cacheable
+    cacheable = request.method == 'GET' and not session.get('_flashes')
+
+    html = render_template('list_detail.html', list=list_obj, add_item_form=add_item_form, share_form=share_form, stats=stats, tick_counts=tick_counts(stats), archived_items=archived_items, archived_next_cursor=archived_next_cursor, title=list_obj.name)
+    if not cacheable:
+        return html
+    return with_etag(make_response(html), list_detail_etag(list_id, list_obj.version))
+
+
+@list_bp.route('/list/<int:list_id>/events')
+@login_required
+def list_events_stream(list_id):
+    list_obj = List.query.get_or_404(list_id)
+    if not can_view_list(list_obj, current_user.id):
+        abort(403)
+
+    # Each open stream holds a worker thread; run enough threads (or an async worker) for the watchers
+    response = Response(list_events.stream(list_events.subscribe(list_id)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # Stop nginx from buffering the stream
+    return response
+
 
-    return render_template('list_detail.html', list=list_obj, add_item_form=add_item_form, share_form=share_form, tick_counts=tick_counts, title=list_obj.name)
\ No newline at end of file
+def list_detail_etag(list_id, version):
+    return list_etag(list_id, version, current_user.id, csrf_window(), wants_archived())
\ No newline at end of file
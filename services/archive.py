@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+import click
+from flask import current_app, request
+from flask.cli import with_appcontext
+from sqlalchemy import select, insert, delete, literal
+from models import db, Item, ItemArchive
+from services.list_changes import list_changed
+from services.list_events import item_deleted
+from services.delta_sync import record_tombstones, purge_tombstones
+
+ARCHIVE_BATCH_SIZE = 1000
+_ARCHIVED_COLUMNS = ('item_id', 'name', 'list_id', 'added_by_id', 'added_at', 'ticked_by_id', 'ticked_at', 'archived_at')
+
+
+def archive_ticked_items(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move items ticked before cutoff from item to item_archive; returns how many moved.
+
+    Each batch is its own short transaction: lock the batch, copy it with one
+    INSERT ... SELECT, delete it, and bump the affected lists' versions. The
+    job can be interrupted and rerun at any point.
+    """
+    moved = 0
+    while True:
+        rows = db.session.execute(
+            select(Item.id, Item.list_id)
+            .where(Item.is_ticked.is_(True), Item.ticked_at < cutoff)
+            .order_by(Item.id)
+            .limit(batch_size)
+            .with_for_update() # An untick racing the copy must not leave the item in both tables
+        ).all()
+        if not rows:
+            break
+        item_ids = [row.id for row in rows]
+        db.session.execute(insert(ItemArchive).from_select(
+            _ARCHIVED_COLUMNS,
+            select(Item.id, Item.name, Item.list_id, Item.added_by_id, Item.added_at, Item.ticked_by_id, Item.ticked_at,
+                   literal(datetime.utcnow()))
+            .where(Item.id.in_(item_ids)),
+        ))
+        db.session.execute(delete(Item).where(Item.id.in_(item_ids)), execution_options={'synchronize_session': False})
+        for list_id in sorted({row.list_id for row in rows}):
+            # Open pages and syncing clients drop the rows like deleted items
+            list_item_ids = [row.id for row in rows if row.list_id == list_id]
+            record_tombstones(list_id, list_item_ids)
+            list_changed(list_id, *[item_deleted(item_id) for item_id in list_item_ids])
+        db.session.commit()
+        moved += len(rows)
+        if len(rows) < batch_size:
+            break
+    return moved
+
+
+def wants_archived():
+    # ?include_archived=1 adds the archived items to a list view
+    return request.args.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+
+@click.command('archive-items')
+@click.option('--days', type=int, help='Archive items ticked more than this many days ago (default: ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, show_default=True, help='Items moved per transaction.')
+@with_appcontext
+def archive_items_command(days, batch_size):
+    """Move old ticked items to item_archive and drop expired tombstones. Run it from cron."""
+    if days is None:
+        days = current_app.config['ARCHIVE_AFTER_DAYS']
+    moved = archive_ticked_items(datetime.utcnow() - timedelta(days=days), batch_size)
+    click.echo(f'Archived {moved} items ticked more than {days} days ago.')
+    retention_days = current_app.config['TOMBSTONE_RETENTION_DAYS']
+    purged = purge_tombstones(datetime.utcnow() - timedelta(days=retention_days))
+    click.echo(f'Purged {purged} tombstones older than {retention_days} days.')
@@ -0,0 +1,182 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class CacheBackend:
+    """Minimal key/value interface the response cache needs from a store."""
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    # Caching disabled: every read is a miss
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache(CacheBackend):
+    """In-process cache bounded by entry count, with a per-entry TTL."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCache(CacheBackend):
+    """Backend for any client speaking the redis-py API (get, set with ex=, delete, scan_iter).
+
+    Values are stored as JSON, so cached payloads must be JSON-serializable.
+    """
+
+    def __init__(self, client, prefix='dbwe:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    """Cache for serialized read payloads, grouped into invalidatable namespaces.
+
+    Each namespace (e.g. one list, or one user's list index) has a generation
+    token stored in the backend; keys are built from it, so invalidating a
+    namespace is a single delete and stale entries simply age out.
+    """
+
+    def __init__(self):
+        self.backend = NullCache()
+        self.default_ttl = 60
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app, backend=None):
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 60)
+        if backend is not None:
+            self.backend = backend
+            return
+        cache_type = app.config.get('CACHE_TYPE', 'lru')
+        if cache_type == 'lru':
+            self.backend = LRUCache(app.config.get('CACHE_MAX_ENTRIES', 10000))
+        elif cache_type == 'redis':
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("CACHE_TYPE 'redis' requires the redis package")
+            self.backend = RedisCache(redis.Redis.from_url(app.config['CACHE_REDIS_URL']))
+        elif cache_type == 'null':
+            self.backend = NullCache()
+        else:
+            raise ValueError(f"Unknown CACHE_TYPE {cache_type!r}")
+
+    def generation(self, namespace):
+        # Current token of a namespace; changes whenever the namespace is invalidated
+        key = f'{namespace}:gen'
+        generation = self.backend.get(key)
+        if generation is None:
+            generation = uuid.uuid4().hex[:8]
+            # The token outlives the entries built from it, so they expire first
+            self.backend.set(key, generation, self.default_ttl * 2)
+        return generation
+
+    def get_or_set(self, namespace, key, loader, ttl=None, store=True):
+        """Return the cached value for key in namespace, calling loader() on a miss.
+
+        A loader result of None is returned but not cached, and neither is
+        anything when store is false (the loader may have read stale data).
+        """
+        full_key = f'{namespace}:{self.generation(namespace)}:{key}'
+        value = self.backend.get(full_key)
+        if value is not None:
+            self._count(hit=True)
+            return value
+        self._count(hit=False)
+        value = loader()
+        if value is not None and store:
+            self.backend.set(full_key, value, ttl or self.default_ttl)
+        return value
+
+    def invalidate(self, *namespaces):
+        for namespace in namespaces:
+            self.backend.delete(f'{namespace}:gen')
+
+    def clear(self):
+        self.backend.clear()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        return {'backend': type(self.backend).__name__, 'hits': self.hits, 'misses': self.misses}
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,45 @@
+import gzip
+from flask import request
+
+# No text/html: pages embed the CSRF token next to user-controlled text, and
+# compressing both lets an attacker read the token from response sizes (BREACH)
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/csv', 'application/x-ndjson')
+
+
+class ResponseCompressor:
+    """gzip for large JSON and CSV responses, when the client accepts it.
+
+    Streamed responses (SSE, exports) and files are left alone; fingerprinted
+    static files are served precompressed by services/static_assets.py.
+    """
+
+    def __init__(self):
+        self.min_size = 1024
+        self.level = 6
+
+    def init_app(self, app):
+        self.min_size = app.config.get('GZIP_MIN_SIZE', self.min_size)
+        self.level = app.config.get('GZIP_LEVEL', self.level)
+        if self.level:
+            app.after_request(self._compress)
+
+    def _compress(self, response):
+        if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES or 'Content-Encoding' in response.headers):
+            return response
+        response.vary.add('Accept-Encoding')
+        if not request.accept_encodings['gzip']:
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        response.set_data(gzip.compress(data, compresslevel=self.level))
+        response.headers['Content-Encoding'] = 'gzip'
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # Same content, different bytes: a strong ETag may not be shared with the identity body
+            response.set_etag(etag, weak=True)
+        return response
+
+
+response_compressor = ResponseCompressor()
@@ -0,0 +1,43 @@
+import time
+from flask import current_app, request, session, make_response
+from sqlalchemy import select, exists, or_
+from models import db, List, ListParticipant
+
+
+def visible_list_version(list_id, user_id):
+    # One indexed lookup: the list's version if the user may see it, else None
+    participates = exists().where(ListParticipant.list_id == List.id, ListParticipant.user_id == user_id)
+    return db.session.scalar(
+        select(List.version).where(List.id == list_id, or_(List.created_by_id == user_id, participates))
+    )
+
+
+def list_etag(list_id, version, user_id, *parts):
+    # Everything besides the version that changes the rendered payload goes into parts
+    return '.'.join(str(part) for part in ('list', list_id, version, user_id) + parts)
+
+
+def csrf_window():
+    # Pages embed a time-limited CSRF token, so a cached page must not outlive it.
+    # Rolling the ETag every half time-limit keeps a revalidated page's token valid.
+    time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    if not time_limit:
+        return 0
+    return int(time.time()) // max(time_limit // 2, 1)
+
+
+def is_not_modified(etag):
+    if session.get('_flashes'): # Pending flash messages have to be rendered
+        return False
+    return request.if_none_match.contains_weak(etag) # Weak comparison, as RFC 9110 specifies; gzip weakens ETags
+
+
+def not_modified(etag):
+    response = make_response('', 304)
+    return with_etag(response, etag)
+
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache' # Always revalidate, never share
+    return response
@@ -0,0 +1,126 @@
+import functools
+import math
+import time
+from flask import g, request, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from flask_login import current_user
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+from services.cache import response_cache
+
+REPLICA_BIND = 'replica'
+STICKY_COOKIE = 'db_primary_until'
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica bind while a request has opted in (see replica_reads).
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary, and
+    without a replica configured everything does.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not isinstance(clause, UpdateBase)
+                and has_request_context() and g.get('use_replica')):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flushed(session, flush_context):
+    _mark_write()
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_write()
+
+
+def _mark_write():
+    if has_request_context():
+        g.db_wrote = True
+
+
+def reading_from_replica():
+    # True while this request's reads go to the replica, so what they return may lag the primary
+    return has_request_context() and bool(g.get('use_replica')) and replica_router.has_replica()
+
+
+def replica_reads(view):
+    """Serve a read-only view from the replica, unless this client wrote recently.
+
+    After any write the client gets a short-lived cookie, and the user a
+    short-lived marker in the cache backend, that keep its reads on the
+    primary, so it always sees its own changes despite replication lag. The
+    marker covers API clients that drop cookies; apply the decorator below
+    jwt_required/login_required so the user is known. Only GET requests are
+    routed; other methods of the same view use the primary.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method == 'GET':
+            g.use_replica = not replica_router.wrote_recently()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def _request_user_id():
+    # The JWT subject on API requests, the logged-in user on pages, None for anonymous ones
+    try:
+        return get_jwt_identity()
+    except RuntimeError: # No JWT was verified for this request
+        pass
+    return current_user.get_id() if current_user.is_authenticated else None
+
+
+def _sticky_key(user_id):
+    return f'user:{user_id}:primary'
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.sticky_seconds = 5
+        self._db = None
+
+    def init_app(self, app, db):
+        self._db = db
+        self.sticky_seconds = app.config.get('DB_REPLICA_STICKY_SECONDS', 5)
+        if REPLICA_BIND in app.config.get('SQLALCHEMY_BINDS', {}):
+            app.after_request(self._stick_to_primary)
+
+    def has_replica(self):
+        return self._db is not None and REPLICA_BIND in self._db.engines
+
+    def wrote_recently(self):
+        if request.cookies.get(STICKY_COOKIE, type=float, default=0) >= time.time():
+            return True
+        user_id = _request_user_id()
+        # Only seen by every worker with a shared backend (CACHE_TYPE=redis)
+        return user_id is not None and response_cache.backend.get(_sticky_key(user_id)) is not None
+
+    def _stick_to_primary(self, response):
+        if g.get('db_wrote'):
+            until = time.time() + self.sticky_seconds
+            response.set_cookie(STICKY_COOKIE, f'{until:.3f}', max_age=int(self.sticky_seconds) + 1, httponly=True, samesite='Lax')
+            user_id = _request_user_id()
+            if user_id is not None:
+                response_cache.backend.set(_sticky_key(user_id), until, math.ceil(self.sticky_seconds))
+        return response
+
+    def pool_stats(self):
+        # Connection pool state per bind ('primary', 'replica'), for /metrics
+        stats = {}
+        for bind_key, engine in self._db.engines.items():
+            pool = engine.pool
+            entry = {'pool': type(pool).__name__, 'status': pool.status()}
+            if hasattr(pool, 'checkedout'): # QueuePool and friends
+                entry.update(size=pool.size(), checked_in=pool.checkedin(), checked_out=pool.checkedout(), overflow=pool.overflow())
+            stats[bind_key or 'primary'] = entry
+        return stats
+
+
+replica_router = ReplicaRouter()
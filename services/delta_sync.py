@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, insert, delete
+from models import db, Item, ItemTombstone
+from services.list_loader import item_query
+from services.serializers import item_data
+
+# Changes are looked up from this long before the cursor's time. It covers
+# clock skew between workers and transactions that commit after a sync has
+# already read past their timestamp; clients apply changes idempotently, so
+# seeing a change twice is harmless.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def make_cursor(version, timestamp):
+    return f'{version}.{int(timestamp.timestamp() * 1000)}'
+
+
+def parse_cursor(cursor):
+    # (list version, time) from a cursor; ValueError if it is malformed
+    version, _, millis = cursor.partition('.')
+    try:
+        return int(version), datetime.utcfromtimestamp(int(millis) / 1000)
+    except (OverflowError, OSError) as e: # A time outside what datetime or the platform can represent
+        raise ValueError(f'Invalid cursor time: {millis}') from e
+
+
+def record_tombstones(list_id, item_ids):
+    # Call in the transaction that deletes the items
+    if item_ids:
+        now = datetime.utcnow()
+        db.session.execute(insert(ItemTombstone), [{'item_id': item_id, 'list_id': list_id, 'deleted_at': now} for item_id in item_ids])
+
+
+def purge_tombstones(cutoff):
+    # Clients whose cursor is older than the oldest tombstone get a full snapshot instead
+    result = db.session.execute(delete(ItemTombstone).where(ItemTombstone.deleted_at < cutoff))
+    db.session.commit()
+    return result.rowcount
+
+
+def item_changes(list_id, version, since=None):
+    """Items changed and removed since a cursor, for a list at the given version.
+
+    An unchanged list (same version as the cursor) costs nothing beyond the
+    version lookup the caller already did. Otherwise changed items come from
+    the (list_id, updated_at) index and removals from the tombstones. Without
+    a cursor, or with one older than the tombstone retention, the whole list
+    is returned with full=True and the client replaces its copy.
+    """
+    now = datetime.utcnow()
+    changes = {'cursor': make_cursor(version, now), 'full': False, 'items': [], 'deleted': []}
+    retention = timedelta(days=current_app.config.get('TOMBSTONE_RETENTION_DAYS', 30))
+    if since is not None:
+        since_version, since_time = parse_cursor(since)
+        if since_version == version:
+            return changes
+        if since_time >= now - retention:
+            changed_after = since_time - SYNC_OVERLAP
+            items = item_query(list_id).filter(Item.updated_at >= changed_after).order_by(Item.id).all()
+            changes['items'] = [item_data(item) for item in items]
+            changes['deleted'] = db.session.scalars(
+                select(ItemTombstone.item_id)
+                .where(ItemTombstone.list_id == list_id, ItemTombstone.deleted_at >= changed_after)
+                .order_by(ItemTombstone.item_id)
+            ).all()
+            return changes
+
+    changes['full'] = True
+    changes['items'] = [item_data(item) for item in item_query(list_id).order_by(Item.id)]
+    return changes
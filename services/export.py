@@ -0,0 +1,108 @@
+import csv
+import io
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from models import db, User, List, Item
+from services.list_loader import visible_to
+from services.serializers import timestamp, dumps
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+EXPORT_BATCH_SIZE = 1000 # Rows fetched from the cursor and written to the response at a time
+
+CSV_COLUMNS = [
+    'list_id', 'list_name', 'list_created_by', 'list_created_at',
+    'item_id', 'item_name', 'is_ticked', 'added_by', 'added_at', 'ticked_by', 'ticked_at',
+]
+
+
+def export_rows(user_id):
+    """Stream (list, item) rows for every list visible to the user, ordered by list then item.
+
+    Plain column tuples are read through a server-side cursor in batches of
+    EXPORT_BATCH_SIZE, so no ORM objects are built and memory stays flat.
+    Lists without items come back once with the item columns set to None.
+    """
+    creator = aliased(User)
+    adder = aliased(User)
+    ticker = aliased(User)
+    stmt = (
+        select(
+            List.id, List.name, creator.username, List.created_at, List.created_by_id,
+            Item.id, Item.name, Item.is_ticked, adder.username, Item.added_at, ticker.username, Item.ticked_at,
+        )
+        .join(creator, List.created_by_id == creator.id)
+        .outerjoin(Item, Item.list_id == List.id)
+        .outerjoin(adder, Item.added_by_id == adder.id)
+        .outerjoin(ticker, Item.ticked_by_id == ticker.id)
+        .where(visible_to(user_id))
+        .order_by(List.id, Item.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    return db.session.execute(stmt)
+
+
+def export_ndjson(user_id):
+    # One {"type": "list"} line per list, followed by one {"type": "item"} line per item
+    current_list_id = None
+    lines = []
+    for row in export_rows(user_id):
+        (list_id, list_name, created_by, created_at, created_by_id,
+         item_id, item_name, is_ticked, added_by, added_at, ticked_by, ticked_at) = row
+        if list_id != current_list_id:
+            current_list_id = list_id
+            lines.append(dumps({
+                'type': 'list',
+                'id': list_id,
+                'name': list_name,
+                'created_by': created_by,
+                'created_at': timestamp(created_at),
+                'is_creator': created_by_id == user_id,
+            }))
+        if item_id is not None:
+            lines.append(dumps({
+                'type': 'item',
+                'id': item_id,
+                'list_id': list_id,
+                'name': item_name,
+                'is_ticked': bool(is_ticked),
+                'added_by': added_by,
+                'added_at': timestamp(added_at),
+                'ticked_by': ticked_by,
+                'ticked_at': timestamp(ticked_at),
+            }))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def export_csv(user_id):
+    # One row per item; the list columns repeat on every row of the list
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue() # Header goes out before the first query returns
+    buffer.seek(0)
+    buffer.truncate()
+
+    rows_in_buffer = 0
+    for row in export_rows(user_id):
+        (list_id, list_name, created_by, created_at, created_by_id,
+         item_id, item_name, is_ticked, added_by, added_at, ticked_by, ticked_at) = row
+        writer.writerow([
+            list_id, list_name, created_by, timestamp(created_at),
+            item_id, item_name, '' if item_id is None else int(bool(is_ticked)),
+            added_by, timestamp(added_at), ticked_by, timestamp(ticked_at),
+        ])
+        rows_in_buffer += 1
+        if rows_in_buffer >= EXPORT_BATCH_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows_in_buffer = 0
+    if rows_in_buffer:
+        yield buffer.getvalue()
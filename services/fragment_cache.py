@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from services.cache import NullCache, response_cache
+from services.db_routing import reading_from_replica
+from services.list_cache import list_namespace, user_lists_namespace
+
+
+class FragmentCache:
+    """Rendered template fragments, in process, bounded by their total size.
+
+    Fragments belong to a response cache namespace and are keyed on its
+    generation, so whatever invalidates a list's or a user's cached payloads
+    (list_changed, user_changed) also retires their fragments; the stale ones
+    fall out of the LRU. Templates use it through the {% cache %} tag.
+    """
+
+    def __init__(self):
+        self.max_bytes = 32 * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # key -> (expires_at, html), least recently used first
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_bytes = app.config.get('FRAGMENT_CACHE_MAX_BYTES', self.max_bytes)
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.globals.update(list_namespace=list_namespace, user_lists_namespace=user_lists_namespace)
+
+    def get_or_render(self, namespace, parts, render):
+        key = ':'.join(str(part) for part in (namespace, response_cache.generation(namespace), *parts))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return Markup(entry[1])
+            self.misses += 1
+        html = render()
+        if not reading_from_replica(): # Possibly stale; see list_cache.user_list_page
+            self._store(key, str(html))
+        return html
+
+    def _store(self, key, html):
+        size = len(html) # Characters, which is close enough to bytes for markup
+        if size > self.max_bytes // 4: # One huge list must not flush everything else
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[1])
+            self._entries[key] = (time.monotonic() + response_cache.default_ttl, html)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        return {'entries': len(self._entries), 'bytes': self._size, 'max_bytes': self.max_bytes, 'hits': self.hits, 'misses': self.misses}
+
+
+class FragmentCacheExtension(Extension):
+    """{% cache namespace, key, ... %}...{% endcache %}
+
+    Renders the body once per namespace generation and key, and serves the
+    stored HTML after that. The key must cover everything the body shows that
+    the namespace's invalidation does not (the current user, form state).
+    """
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(args)]), [], [], body).set_lineno(lineno)
+
+    def _render(self, args, caller):
+        namespace, *parts = args
+        # A NullCache hands out a new generation on every call, so nothing stored could be found again
+        if not fragment_cache.max_bytes or isinstance(response_cache.backend, NullCache):
+            return caller()
+        return fragment_cache.get_or_render(namespace, parts, caller)
+
+
+fragment_cache = FragmentCache()
@@ -0,0 +1,81 @@
+from flask_jwt_extended import get_current_user
+from werkzeug.local import LocalProxy
+from models import db, User
+from services.cache import LRUCache
+
+
+class UserSnapshot:
+    """Read-only copy of the user fields request handlers need.
+
+    Unlike a User instance it is not bound to a session, so one copy can be
+    cached and shared between requests and threads. It implements the
+    Flask-Login user protocol, so it also serves as current_user for pages.
+    """
+
+    __slots__ = ('id', 'username', 'email')
+
+    def __init__(self, id, username, email):
+        self.id = id
+        self.username = username
+        self.email = email
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.email)
+
+    # Flask-Login protocol; only real, logged-in users are ever loaded
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def get_id(self):
+        return str(self.id)
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.username}>'
+
+
+class IdentityCache:
+    """Per-process, short-lived cache of user id -> UserSnapshot.
+
+    Used by both the JWT user lookup and the Flask-Login user loader. Entries
+    for a user are dropped when that user is changed or deleted through this
+    process; other processes see the change once their entry expires.
+    """
+
+    def __init__(self):
+        self.ttl = 30
+        self._snapshots = LRUCache(10000)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('IDENTITY_CACHE_TTL', 30)
+        self._snapshots = LRUCache(app.config.get('IDENTITY_CACHE_MAX_ENTRIES', 10000))
+
+    def get(self, user_id):
+        snapshot = self._snapshots.get(user_id)
+        if snapshot is None:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            snapshot = UserSnapshot.from_user(user)
+            self._snapshots.set(user_id, snapshot, self.ttl)
+        return snapshot
+
+    def forget(self, user_id):
+        self._snapshots.delete(user_id)
+
+
+identity_cache = IdentityCache()
+
+
+def load_api_user(jwt_header, jwt_data):
+    # Tokens carry the user id as their subject (see api.create_token)
+    try:
+        user_id = int(jwt_data['sub'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return identity_cache.get(user_id)
+
+
+# The authenticated user of the current JWT request, as a UserSnapshot
+current_api_user = LocalProxy(get_current_user)
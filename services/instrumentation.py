@@ -0,0 +1,176 @@
+import hmac
+import logging
+import threading
+import time
+from collections import deque
+from flask import current_app, g, request, jsonify, abort, has_request_context, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last one catches everything slower
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+TIMINGS = ('sql', 'render', 'bcrypt')
+
+
+def add_timing(name, seconds):
+    # Attribute time spent in one of TIMINGS to the current request, if there is one
+    if has_request_context() and 'perf' in g:
+        g.perf[name] += seconds
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.queries = 0
+        self.total_ms = 0.0
+        self.timings_ms = dict.fromkeys(TIMINGS, 0.0)
+        self.histogram = [0] * len(HISTOGRAM_BUCKETS_MS)
+
+    def record(self, status_code, total_ms, queries, timings_ms):
+        self.requests += 1
+        if status_code >= 500:
+            self.errors += 1
+        self.queries += queries
+        self.total_ms += total_ms
+        for name, ms in timings_ms.items():
+            self.timings_ms[name] += ms
+        for index, upper_bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            if total_ms <= upper_bound:
+                self.histogram[index] += 1
+                break
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the given fraction of requests
+        threshold = fraction * self.requests
+        seen = 0
+        for upper_bound, count in zip(HISTOGRAM_BUCKETS_MS, self.histogram):
+            seen += count
+            if seen >= threshold:
+                return upper_bound if upper_bound != float('inf') else None
+        return None
+
+    def as_dict(self):
+        requests = self.requests or 1
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'avg_ms': round(self.total_ms / requests, 2),
+            'avg_queries': round(self.queries / requests, 2),
+            'avg_timings_ms': {name: round(ms / requests, 2) for name, ms in self.timings_ms.items()},
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'histogram_ms': {
+                ('+Inf' if upper_bound == float('inf') else str(upper_bound)): count
+                for upper_bound, count in zip(HISTOGRAM_BUCKETS_MS, self.histogram)
+            },
+        }
+
+
+class Instrumentation:
+    """Per-request query counts and timings, Server-Timing headers and a /metrics endpoint.
+
+    SQL time is measured with engine cursor events, template time with Flask's
+    template signals and bcrypt time by the password hasher (add_timing). The
+    per-endpoint aggregates are kept in memory, per process.
+    """
+
+    def __init__(self):
+        self.slow_query_ms = 100
+        self.slow_queries = deque(maxlen=50)
+        self.extra_stats = {} # name -> callable returning a JSON-able dict, shown on /metrics
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self._engine_hooked = False
+
+    def init_app(self, app):
+        self.slow_query_ms = app.config.get('SLOW_QUERY_MS', 100)
+        self.slow_queries = deque(maxlen=app.config.get('SLOW_QUERY_SAMPLES', 50))
+        if not self._engine_hooked:
+            # Listening on the Engine class covers every engine, including extra binds
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._engine_hooked = True
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+
+    def _start_request(self):
+        g.perf = dict.fromkeys(TIMINGS, 0.0)
+        g.perf_queries = 0
+        g.perf_start = time.perf_counter()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        if not has_request_context() or 'perf' not in g:
+            return
+        g.perf['sql'] += elapsed
+        g.perf_queries += 1
+        if elapsed * 1000 >= self.slow_query_ms:
+            sample = {
+                'endpoint': request.endpoint,
+                'ms': round(elapsed * 1000, 2),
+                'statement': statement[:500], # Parameters are left out on purpose
+            }
+            self.slow_queries.append(sample)
+            logger.warning('slow query endpoint=%s ms=%.1f statement=%r', sample['endpoint'], sample['ms'], sample['statement'])
+
+    def _before_render(self, sender, template, context, **extra):
+        if 'perf' in g:
+            g.setdefault('perf_render_start', []).append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        if 'perf' in g and g.get('perf_render_start'):
+            g.perf['render'] += time.perf_counter() - g.perf_render_start.pop()
+
+    def _finish_request(self, response):
+        if 'perf' not in g:
+            return response
+        total_ms = (time.perf_counter() - g.perf_start) * 1000
+        timings_ms = {name: seconds * 1000 for name, seconds in g.perf.items()}
+        server_timing = [f'db;dur={timings_ms["sql"]:.1f};desc="{g.perf_queries} queries"']
+        server_timing += [f'{name};dur={timings_ms[name]:.1f}' for name in ('render', 'bcrypt') if timings_ms[name]]
+        server_timing.append(f'total;dur={total_ms:.1f}')
+        response.headers['Server-Timing'] = ', '.join(server_timing)
+
+        endpoint = request.endpoint or 'unmatched'
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.record(response.status_code, total_ms, g.perf_queries, timings_ms)
+        logger.debug(
+            'request endpoint=%s method=%s status=%s total_ms=%.1f queries=%d sql_ms=%.1f render_ms=%.1f bcrypt_ms=%.1f',
+            endpoint, request.method, response.status_code, total_ms, g.perf_queries,
+            timings_ms['sql'], timings_ms['render'], timings_ms['bcrypt'],
+        )
+        return response
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {endpoint: stats.as_dict() for endpoint, stats in sorted(self._endpoints.items())}
+        metrics = {'endpoints': endpoints, 'slow_queries': list(self.slow_queries)}
+        for name, stats in self.extra_stats.items():
+            metrics[name] = stats()
+        return metrics
+
+    def _metrics_view(self):
+        token = current_app.config.get('METRICS_TOKEN')
+        if token:
+            supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+            if not hmac.compare_digest(supplied, token):
+                abort(403)
+        elif request.remote_addr not in ('127.0.0.1', '::1'):
+            abort(403) # Without a token, metrics are only served to local scrapers
+        return jsonify(self.snapshot())
+
+
+instrumentation = Instrumentation()
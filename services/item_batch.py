@@ -0,0 +1,141 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import select, update, delete, bindparam
+from models import db, Item
+from services.list_changes import list_changed
+from services.delta_sync import record_tombstones
+from services.list_events import item_added, item_ticked, item_unticked, item_renamed, item_deleted
+
+BATCH_OPERATIONS = ('add', 'tick', 'untick', 'rename', 'delete')
+MAX_BATCH_OPERATIONS = 500
+ITEM_NAME_MAX_LENGTH = Item.__table__.c.name.type.length
+
+
+def _item_name(operation):
+    name = operation.get('name')
+    if not isinstance(name, str) or not name.strip():
+        return None, "Item name is required"
+    if len(name) > ITEM_NAME_MAX_LENGTH:
+        return None, f"Item name must be at most {ITEM_NAME_MAX_LENGTH} characters"
+    return name, None
+
+
+def _item_id(operation):
+    # JSON true/false would pass as 1/0, so booleans are not ids
+    item_id = operation.get('id')
+    return item_id if isinstance(item_id, int) and not isinstance(item_id, bool) else None
+
+
+def apply_item_batch(list_id, user, operations):
+    """Apply a list of item operations to one list in a single transaction.
+
+    Every operation is validated before anything is written; if any of them
+    fails, nothing is applied. Operations on existing items are folded into
+    their final state first (last tick/untick and rename win, delete wins over
+    everything), then written as one INSERT batch, one UPDATE per tick
+    direction, one executemany UPDATE for renames and one DELETE.
+
+    Returns (results, ok) where results holds one dict per operation, in order.
+    """
+    results = []
+    ok = True
+    referenced_ids = {_item_id(op) for op in operations if isinstance(op, dict)} - {None}
+    existing = {} # item id -> is_ticked
+    versions = {}
+    if referenced_ids:
+        for item_id, is_ticked, version in db.session.execute(
+            select(Item.id, Item.is_ticked, Item.version).where(Item.list_id == list_id, Item.id.in_(referenced_ids))
+        ):
+            existing[item_id] = is_ticked
+            versions[item_id] = version
+
+    new_items = []
+    ticks = {} # item id -> True (tick) / False (untick)
+    renames = {}
+    deleted_ids = set()
+    for index, operation in enumerate(operations):
+        op = operation.get('op') if isinstance(operation, dict) else None
+        result = {'index': index, 'op': op}
+        results.append(result)
+        error = None
+
+        if op not in BATCH_OPERATIONS:
+            error = "Unknown operation"
+        elif op == 'add':
+            name, error = _item_name(operation)
+            if not error:
+                new_items.append((result, Item(name=name, list_id=list_id, added_by_id=user.id)))
+        else:
+            item_id = _item_id(operation)
+            result['id'] = operation.get('id')
+            if item_id not in existing or item_id in deleted_ids:
+                error = "Item not found"
+            elif op == 'rename':
+                name, error = _item_name(operation)
+                if not error:
+                    renames[item_id] = name
+            elif op == 'delete':
+                deleted_ids.add(item_id)
+                ticks.pop(item_id, None)
+                renames.pop(item_id, None)
+            else:
+                ticks[item_id] = op == 'tick'
+
+        if error:
+            result['status'] = 'error'
+            result['msg'] = error
+            ok = False
+        else:
+            result['status'] = 'ok'
+
+    if not ok:
+        for result in results:
+            if result['status'] == 'ok':
+                result['status'] = 'skipped' # Valid, but the batch was rejected as a whole
+        return results, False
+
+    events = []
+    if new_items:
+        db.session.add_all([item for _, item in new_items])
+        db.session.flush() # Assigns the new ids; SQLite and MySQL still get one INSERT per row
+        for result, item in new_items:
+            result['id'] = item.id
+            events.append(item_added(item, user.username))
+
+    # Ticking a ticked item (or unticking an open one) is a no-op
+    tick_ids = [item_id for item_id, ticked in ticks.items() if ticked and not existing[item_id]]
+    untick_ids = [item_id for item_id, ticked in ticks.items() if not ticked and existing[item_id]]
+    # Each tick direction change and rename bumps an item's version once; events carry the final one
+    bumps = Counter(tick_ids + untick_ids + list(renames))
+    new_version = {item_id: versions[item_id] + count for item_id, count in bumps.items()}
+    events.extend(item_ticked(item_id, user.username, new_version[item_id]) for item_id in tick_ids)
+    events.extend(item_unticked(item_id, new_version[item_id]) for item_id in untick_ids)
+    events.extend(item_renamed(item_id, name, new_version[item_id]) for item_id, name in renames.items())
+    events.extend(item_deleted(item_id) for item_id in deleted_ids)
+    if tick_ids:
+        # Already-ticked items keep their original ticker and time
+        db.session.execute(
+            update(Item)
+            .where(Item.list_id == list_id, Item.id.in_(tick_ids), Item.is_ticked.isnot(True))
+            .values(is_ticked=True, ticked_by_id=user.id, ticked_at=datetime.utcnow(), version=Item.version + 1)
+        )
+    if untick_ids:
+        db.session.execute(
+            update(Item)
+            .where(Item.list_id == list_id, Item.id.in_(untick_ids), Item.is_ticked.is_(True))
+            .values(is_ticked=False, ticked_by_id=None, ticked_at=None, version=Item.version + 1)
+        )
+    if renames:
+        # executemany on the table: ORM bulk UPDATE by primary key cannot increment a column
+        items = Item.__table__
+        db.session.execute(
+            update(items).where(items.c.id == bindparam('item_id')).values(name=bindparam('new_name'), version=items.c.version + 1),
+            [{'item_id': item_id, 'new_name': name} for item_id, name in renames.items()],
+        )
+    if deleted_ids:
+        db.session.execute(delete(Item).where(Item.list_id == list_id, Item.id.in_(deleted_ids)))
+        record_tombstones(list_id, sorted(deleted_ids))
+
+    list_changed(list_id, *events)
+    db.session.commit()
+    return results, True
@@ -0,0 +1,81 @@
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.orm import aliased
+from models import db, Item, User
+from services.list_changes import list_changed
+from services.list_events import item_ticked, item_unticked
+from services.serializers import timestamp
+
+
+def _tick_state(item_id, name, is_ticked, ticked_by, ticked_at, version):
+    # Same keys and formats as serializers.item_data, minus the adder
+    return {
+        'id': item_id,
+        'name': name,
+        'is_ticked': is_ticked,
+        'ticked_by': ticked_by,
+        'ticked_at': timestamp(ticked_at),
+        'version': version,
+    }
+
+
+def _current_state(list_id, item_id):
+    ticker = aliased(User)
+    row = db.session.execute(
+        select(Item.name, Item.is_ticked, ticker.username, Item.ticked_at, Item.version)
+        .outerjoin(ticker, Item.ticked_by_id == ticker.id)
+        .where(Item.id == item_id, Item.list_id == list_id)
+    ).first()
+    return row and _tick_state(item_id, row.name, bool(row.is_ticked), row.username, row.ticked_at, row.version)
+
+
+def set_ticked(list_id, item_id, user, ticked, version=None):
+    """Tick or untick one item with a single conditional UPDATE, and commit.
+
+    The UPDATE only matches while the item is in the opposite state (and still
+    at version, when the client sends the version it last saw), so two people
+    tapping the same item cannot overwrite each other: one wins, the other
+    finds the item already in the state it wanted. Only when nothing matched
+    is the row read back, to tell those cases apart.
+
+    Returns (status, state): status is 'ok', 'unchanged' (already in that
+    state), 'conflict' (changed since version) or 'not_found', and state is
+    the item's tick state afterwards, None if not found.
+    """
+    now = datetime.utcnow()
+    if ticked:
+        values = {'is_ticked': True, 'ticked_by_id': user.id, 'ticked_at': now}
+        matches_state = Item.is_ticked.isnot(True)
+    else:
+        values = {'is_ticked': False, 'ticked_by_id': None, 'ticked_at': None}
+        matches_state = Item.is_ticked.is_(True)
+    statement = (
+        update(Item)
+        .where(Item.id == item_id, Item.list_id == list_id, matches_state)
+        .values(version=Item.version + 1, **values)
+        .execution_options(synchronize_session=False)
+    )
+    if version is not None:
+        statement = statement.where(Item.version == version)
+
+    if db.engine.dialect.update_returning:
+        row = db.session.execute(statement.returning(Item.name, Item.version)).first()
+    else:
+        # MySQL has no UPDATE ... RETURNING; read the new version back by primary key
+        updated = db.session.execute(statement).rowcount
+        row = updated and db.session.execute(select(Item.name, Item.version).where(Item.id == item_id)).first()
+
+    if not row:
+        db.session.rollback()
+        state = _current_state(list_id, item_id)
+        if state is None:
+            return 'not_found', None
+        return ('unchanged' if state['is_ticked'] == ticked else 'conflict'), state
+
+    if ticked:
+        event = item_ticked(item_id, user.username, row.version)
+    else:
+        event = item_unticked(item_id, row.version)
+    list_changed(list_id, event)
+    db.session.commit()
+    return 'ok', _tick_state(item_id, row.name, ticked, user.username if ticked else None, values['ticked_at'], row.version)
@@ -0,0 +1,105 @@
+from sqlalchemy.orm import joinedload
+from models import List, Item, ItemArchive
+from services.cache import response_cache
+from services.db_routing import reading_from_replica
+from services.list_changes import on_commit
+from services.list_loader import item_query, archived_item_query, dashboard_query
+from services.pagination import keyset_page
+from services.serializers import timestamp, item_data, archived_item_data, list_entry
+
+
+def list_namespace(list_id):
+    return f'list:{list_id}'
+
+
+def user_lists_namespace(user_id):
+    return f'user:{user_id}:lists'
+
+
+@on_commit
+def invalidate_lists(list_ids, user_ids, events):
+    response_cache.invalidate(
+        *[list_namespace(list_id) for list_id in list_ids],
+        *[user_lists_namespace(user_id) for user_id in user_ids],
+    )
+
+
+def _load_list_summary(list_id):
+    lst = List.query.options(joinedload(List.creator)).filter_by(id=list_id).first()
+    if not lst:
+        return None
+    return {
+        'id': lst.id,
+        'name': lst.name,
+        'created_by': lst.creator.username,
+        'created_by_id': lst.created_by_id,
+        'created_at': timestamp(lst.created_at),
+    }
+
+
+# The list entries below are keyed on the version the caller read from the
+# database (conditional.visible_list_version), never on a cached one, so a
+# lagging cache or a missed invalidation cannot serve a body for the wrong version.
+# A replica's version and body match each other, so replica reads may store them.
+
+def list_summary(list_id, version):
+    # List header, or None if the list does not exist
+    return response_cache.get_or_set(list_namespace(list_id), f'summary:{version}', lambda: _load_list_summary(list_id))
+
+
+def _load_item_page(list_id, limit, cursor):
+    items, next_cursor = keyset_page(item_query(list_id), Item.id, limit, cursor)
+    return [item_data(item) for item in items], next_cursor
+
+
+def item_page(list_id, version, limit, cursor):
+    # (items_data, next_cursor) for one page of a list's items
+    return response_cache.get_or_set(
+        list_namespace(list_id), f'items:{version}:{limit}:{cursor}',
+        lambda: _load_item_page(list_id, limit, cursor),
+    )
+
+
+def _load_archived_item_page(list_id, limit, cursor):
+    archived, next_cursor = keyset_page(archived_item_query(list_id), ItemArchive.id, limit, cursor, descending=True)
+    return [archived_item_data(row) for row in archived], next_cursor
+
+
+def archived_item_page(list_id, version, limit, cursor):
+    # (archived_items_data, next_cursor) for one page of a list's history, most recently archived first
+    return response_cache.get_or_set(
+        list_namespace(list_id), f'archived:{version}:{limit}:{cursor}',
+        lambda: _load_archived_item_page(list_id, limit, cursor),
+    )
+
+
+def _load_user_list_page(user_id, limit, cursor):
+    rows, next_cursor = keyset_page(dashboard_query(user_id), List.id, limit, cursor)
+    return [list_entry(row) for row in rows], next_cursor
+
+
+# These entries are keyed on the namespace generation alone. A replica that has
+# not caught up with the write that invalidated them would refill them with the
+# old lists, so replica reads use the cache but never store into it.
+
+def user_list_page(user_id, limit, cursor):
+    # (lists_data, next_cursor) for one page of the lists a user can see
+    return response_cache.get_or_set(
+        user_lists_namespace(user_id), f'page:{limit}:{cursor}',
+        lambda: _load_user_list_page(user_id, limit, cursor), store=not reading_from_replica(),
+    )
+
+
+def _load_dashboard(user_id):
+    lists = [list_entry(row) for row in dashboard_query(user_id).order_by(List.id)]
+    return {
+        'created_lists': [entry for entry in lists if entry['role'] == 'creator'],
+        'participated_lists': [entry for entry in lists if entry['role'] == 'participant'],
+    }
+
+
+def dashboard(user_id):
+    # The lists shown on list.index, split into created and participated
+    return response_cache.get_or_set(
+        user_lists_namespace(user_id), 'dashboard', lambda: _load_dashboard(user_id), store=not reading_from_replica(),
+    )
@@ -0,0 +1,106 @@
+from datetime import datetime
+from sqlalchemy import event, or_, select, update
+from sqlalchemy.orm import Session
+from models import db, Item, ItemArchive, List, ListParticipant
+
+_commit_listeners = []
+
+
+def on_commit(listener):
+    """Register listener(list_ids, user_ids, events), called after a commit that changed lists.
+
+    list_ids are the lists whose content changed or that were deleted; user_ids
+    are the users whose dashboards (visible lists or their item counts) changed;
+    events are the (list_id, event) pairs passed to list_changed, in order.
+    Listeners run after the transaction is committed and must not use the
+    database session.
+    """
+    _commit_listeners.append(listener)
+    return listener
+
+
+def _pending(session):
+    return session.info.setdefault('list_changes', (set(), set(), []))
+
+
+def list_changed(list_id, *events):
+    """Record that a list's items or participants changed.
+
+    Call inside the transaction that makes the change, before the commit, so
+    the new version becomes visible together with the change itself. events
+    (see services/list_events.py) are handed to listeners once committed.
+    """
+    db.session.execute(
+        update(List).where(List.id == list_id).values(version=List.version + 1)
+    )
+    # The list's item counts appear on the dashboard of its creator and every participant
+    member_ids = db.session.scalars(
+        select(List.created_by_id).where(List.id == list_id)
+        .union(select(ListParticipant.user_id).where(ListParticipant.list_id == list_id))
+    ).all()
+    list_ids, user_ids, pending_events = _pending(db.session)
+    list_ids.add(list_id)
+    user_ids.update(member_ids)
+    pending_events.extend((list_id, event) for event in events)
+
+
+def user_changed(user_id):
+    """Record that a user is being renamed or deleted.
+
+    Their username shows in every list they created or share and every list
+    with items they added or ticked, archived ones included; deleting them
+    also removes their lists and shares. Each of those lists gets a new
+    version, and the items get a new updated_at so delta sync sends them
+    again. Call before the change is flushed, while those rows still point
+    at the user.
+    """
+    changed_ids = db.session.scalars(
+        select(List.id).where(List.created_by_id == user_id)
+        .union(
+            select(ListParticipant.list_id).where(ListParticipant.user_id == user_id),
+            select(Item.list_id).where(or_(Item.added_by_id == user_id, Item.ticked_by_id == user_id)),
+            select(ItemArchive.list_id).where(or_(ItemArchive.added_by_id == user_id, ItemArchive.ticked_by_id == user_id)),
+        )
+    ).all()
+    list_index_changed(user_id)
+    if not changed_ids:
+        return
+    db.session.execute(
+        update(List).where(List.id.in_(changed_ids)).values(version=List.version + 1)
+    )
+    db.session.execute(
+        update(Item).where(or_(Item.added_by_id == user_id, Item.ticked_by_id == user_id))
+        .values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    member_ids = db.session.scalars(
+        select(List.created_by_id).where(List.id.in_(changed_ids))
+        .union(select(ListParticipant.user_id).where(ListParticipant.list_id.in_(changed_ids)))
+    ).all()
+    list_ids, user_ids, _ = _pending(db.session)
+    list_ids.update(changed_ids)
+    user_ids.update(member_ids)
+
+
+def list_index_changed(*user_ids):
+    # A list was created, deleted or shared: these users' dashboards changed
+    _pending(db.session)[1].update(user_ids)
+
+
+def list_deleted(list_id, user_ids):
+    _pending(db.session)[0].add(list_id)
+    list_index_changed(*user_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_listeners(session):
+    list_ids, user_ids, events = session.info.pop('list_changes', (set(), set(), []))
+    if not list_ids and not user_ids:
+        return
+    for listener in _commit_listeners:
+        listener(list_ids, user_ids, events)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop('list_changes', None)
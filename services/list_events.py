@@ -0,0 +1,167 @@
+import json
+import queue
+import threading
+from collections import defaultdict
+from services.list_changes import on_commit
+
+SUBSCRIBER_QUEUE_SIZE = 100 # Events buffered per connection before it is told to resync
+
+
+# version is the item's row version after the change; pages send it back with their next tick
+
+def item_added(item, username):
+    return {'type': 'item_added', 'id': item.id, 'name': item.name, 'added_by': username, 'version': item.version}
+
+
+def item_ticked(item_id, username, version):
+    return {'type': 'item_ticked', 'id': item_id, 'ticked_by': username, 'version': version}
+
+
+def item_unticked(item_id, version):
+    return {'type': 'item_unticked', 'id': item_id, 'version': version}
+
+
+def item_renamed(item_id, name, version):
+    return {'type': 'item_renamed', 'id': item_id, 'name': name, 'version': version}
+
+
+def item_deleted(item_id):
+    return {'type': 'item_deleted', 'id': item_id}
+
+
+class InProcessSubscription:
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def get(self, timeout):
+        # Next event, or None if nothing arrived within timeout seconds
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Pub/sub within one process; only reaches clients connected to the same worker."""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                # A stalled client missed events; drop its backlog and have it reload instead
+                with subscription.queue.mutex:
+                    subscription.queue.queue.clear()
+                subscription.queue.put_nowait({'type': 'resync'})
+
+    def subscribe(self, channel):
+        subscription = InProcessSubscription(self, channel)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+
+class RedisSubscription:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    def get(self, timeout):
+        message = self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        return None if message is None else json.loads(message['data'])
+
+    def close(self):
+        self.pubsub.close()
+
+
+class RedisBroker:
+    """Pub/sub through any client speaking the redis-py API, for multi-worker deployments."""
+
+    def __init__(self, client, prefix='dbwe:'):
+        self.client = client
+        self.prefix = prefix
+
+    def publish(self, channel, event):
+        self.client.publish(self.prefix + channel, json.dumps(event))
+
+    def subscribe(self, channel):
+        pubsub = self.client.pubsub()
+        pubsub.subscribe(self.prefix + channel)
+        return RedisSubscription(pubsub)
+
+
+class ListEvents:
+    """Publishes committed item changes to everyone watching a list."""
+
+    def __init__(self):
+        self.broker = InProcessBroker()
+        self.keepalive = 15
+
+    def init_app(self, app, broker=None):
+        self.keepalive = app.config.get('EVENTS_KEEPALIVE', 15)
+        if broker is not None:
+            self.broker = broker
+            return
+        broker_type = app.config.get('EVENTS_BROKER', 'memory')
+        if broker_type == 'memory':
+            self.broker = InProcessBroker()
+        elif broker_type == 'redis':
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("EVENTS_BROKER 'redis' requires the redis package")
+            self.broker = RedisBroker(redis.Redis.from_url(app.config['EVENTS_REDIS_URL']))
+        else:
+            raise ValueError(f"Unknown EVENTS_BROKER {broker_type!r}")
+
+    def publish(self, list_id, event):
+        self.broker.publish(f'list:{list_id}', event)
+
+    def subscribe(self, list_id):
+        return self.broker.subscribe(f'list:{list_id}')
+
+    def stream(self, subscription):
+        """Server-Sent Events body for a subscription; closes it when the client goes away.
+
+        Runs after the request context is gone, so it must not touch the
+        database or request globals.
+        """
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                event = subscription.get(timeout=self.keepalive)
+                if event is None:
+                    yield ': keepalive\n\n' # Keeps proxies from closing an idle connection
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                if event['type'] == 'resync':
+                    return
+        finally:
+            subscription.close()
+
+
+list_events = ListEvents()
+
+
+@on_commit
+def publish_committed(list_ids, user_ids, events):
+    for list_id, event in events:
+        list_events.publish(list_id, event)
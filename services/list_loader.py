@@ -0,0 +1,78 @@
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import aliased, joinedload, lazyload
+from models import db, List, Item, ItemArchive, ListParticipant, User
+
+
+def list_detail_query():
+    # Creator is joined in. Items load on first access, in one SELECT with the
+    # adder/ticker of every item joined onto it, so the cost does not grow with
+    # the list and a page whose item rows come from the fragment cache skips it.
+    return List.query.options(
+        joinedload(List.creator),
+        lazyload(List.items).options(
+            joinedload(Item.added_by_user),
+            joinedload(Item.ticked_by_user),
+        ),
+    )
+
+
+def item_query(list_id):
+    # Items of one list as plain column rows (see serializers.item_data), adder/ticker names joined in.
+    # No ORM objects are built, which is most of the cost of a large page.
+    adder = aliased(User)
+    ticker = aliased(User)
+    return db.session.query(
+        Item.id, Item.name, Item.is_ticked, adder.username.label('added_by'), Item.added_at,
+        ticker.username.label('ticked_by'), Item.ticked_at, Item.version,
+    ).outerjoin(adder, Item.added_by_id == adder.id).outerjoin(ticker, Item.ticked_by_id == ticker.id).filter(
+        Item.list_id == list_id
+    )
+
+
+def archived_item_query(list_id):
+    # A list's archived items as plain column rows (see serializers.archived_item_data)
+    adder = aliased(User)
+    ticker = aliased(User)
+    return db.session.query(
+        ItemArchive.id, ItemArchive.item_id, ItemArchive.name, adder.username.label('added_by'), ItemArchive.added_at,
+        ticker.username.label('ticked_by'), ItemArchive.ticked_at, ItemArchive.archived_at,
+    ).outerjoin(adder, ItemArchive.added_by_id == adder.id).outerjoin(ticker, ItemArchive.ticked_by_id == ticker.id).filter(
+        ItemArchive.list_id == list_id
+    )
+
+
+def load_list_detail(list_id):
+    return list_detail_query().get_or_404(list_id)
+
+
+def visible_to(user_id):
+    # WHERE clause for the lists a user created or participates in
+    participated_ids = select(ListParticipant.list_id).where(ListParticipant.user_id == user_id)
+    return or_(List.created_by_id == user_id, List.id.in_(participated_ids))
+
+
+def dashboard_query(user_id):
+    """Each list the user can see, once, with creator name, the user's role and item counts.
+
+    Creator and items are joined onto the visible lists and grouped, so the
+    whole dashboard is one query however many lists there are. Rows have
+    id, name, created_at, created_by, role, item_count and open_count.
+    """
+    return db.session.query(
+        List.id,
+        List.name,
+        List.created_at,
+        User.username.label('created_by'),
+        case((List.created_by_id == user_id, 'creator'), else_='participant').label('role'),
+        func.count(Item.id).label('item_count'),
+        # NULL is_ticked counts as open, as in item_ticks and list_stats; Item.id is NULL for a list without items
+        func.coalesce(func.sum(case((and_(Item.id.isnot(None), Item.is_ticked.isnot(True)), 1), else_=0)), 0).label('open_count'),
+    ).join(User, List.created_by_id == User.id).outerjoin(Item, Item.list_id == List.id).filter(
+        visible_to(user_id)
+    ).group_by(List.id, List.name, List.created_at, List.created_by_id, User.username)
+
+
+def can_view_list(lst, user_id):
+    if lst.created_by_id == user_id:
+        return True
+    return ListParticipant.query.filter_by(list_id=lst.id, user_id=user_id).first() is not None
@@ -0,0 +1,49 @@
+from sqlalchemy import select, func, literal, union_all
+from models import db, User, Item
+
+
+def list_stats(list_id):
+    """Item totals and per-user add/tick counts for a list, in a single query.
+
+    Adds are grouped by added_by_id and ticks by ticked_by_id; the two groupings
+    are UNIONed and joined to user once, and the list totals are the sums of the
+    per-user counts.
+    """
+    adds = (
+        select(Item.added_by_id.label('user_id'), func.count().label('added'), literal(0).label('ticked'))
+        .where(Item.list_id == list_id)
+        .group_by(Item.added_by_id)
+    )
+    ticks = (
+        select(Item.ticked_by_id.label('user_id'), literal(0).label('added'), func.count().label('ticked'))
+        .where(Item.list_id == list_id, Item.is_ticked.is_(True))
+        .group_by(Item.ticked_by_id)
+    )
+    counts = union_all(adds, ticks).subquery()
+    rows = db.session.execute(
+        select(User.username, func.sum(counts.c.added), func.sum(counts.c.ticked))
+        .select_from(counts)
+        .outerjoin(User, User.id == counts.c.user_id)
+        .group_by(counts.c.user_id, User.username)
+    ).all()
+
+    users = []
+    total_items = ticked_items = 0
+    for username, added, ticked in rows:
+        total_items += added
+        ticked_items += ticked
+        if username is not None: # Ticks by a user that no longer exists still count towards the totals
+            users.append({'username': username, 'added': int(added), 'ticked': int(ticked)})
+    users.sort(key=lambda user: (-user['ticked'], -user['added'], user['username']))
+
+    return {
+        'total_items': int(total_items),
+        'ticked_items': int(ticked_items),
+        'open_items': int(total_items - ticked_items),
+        'users': users,
+    }
+
+
+def tick_counts(stats):
+    # username -> number of items ticked, most ticks first (the list_detail leaderboard)
+    return {user['username']: user['ticked'] for user in stats['users'] if user['ticked']}
@@ -0,0 +1,28 @@
+from flask import request
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def page_args():
+    # ?limit=<n>&cursor=<last id seen>; bad values fall back to the first default-sized page
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor', type=int)
+    return limit, cursor
+
+
+def keyset_page(query, id_column, limit, cursor=None, descending=False):
+    """Return (rows, next_cursor) for the page of `query` after `cursor`, ordered by `id_column`.
+
+    Seeks on the primary key instead of using OFFSET, so every page costs the same
+    no matter how deep into the table it is. next_cursor is None on the last page.
+    With descending=True the newest rows come first.
+    """
+    if cursor is not None:
+        query = query.filter(id_column < cursor if descending else id_column > cursor)
+    rows = query.order_by(id_column.desc() if descending else id_column).limit(limit + 1).all() # One extra row tells us whether there is a next page
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, getattr(rows[-1], id_column.key)
+    return rows, None
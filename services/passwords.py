@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from werkzeug.exceptions import ServiceUnavailable
+from services.instrumentation import add_timing
+
+
+class HashingBusy(ServiceUnavailable):
+    description = 'Too many password checks in progress. Please try again shortly.'
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded worker pool instead of the request thread.
+
+    At most max_concurrency hashes run at once and at most queue_depth more
+    wait for a worker; anything beyond that is rejected immediately with
+    HashingBusy (503), so a login burst cannot pin every request worker.
+    bcrypt releases the GIL, so threads hash in parallel.
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.timeout = 10
+        self.max_concurrency = 1
+        self._executor = None
+        self._slots = None
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        self.timeout = app.config.get('BCRYPT_QUEUE_TIMEOUT', 10)
+        self.max_concurrency = max_concurrency = app.config.get('BCRYPT_MAX_CONCURRENCY', os.cpu_count() or 1)
+        queue_depth = app.config.get('BCRYPT_QUEUE_DEPTH', max_concurrency * 4)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(max_concurrency + queue_depth)
+
+    def _run(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return self._submit(fn, *args)
+        finally:
+            add_timing('bcrypt', time.perf_counter() - started) # Includes time spent queued
+
+    def _submit(self, fn, *args):
+        if self._executor is None:
+            return fn(*args) # Not initialised with an app (e.g. a script): hash inline
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(retry_after=1)
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError: # Queued too long; the job still finishes and frees its slot
+            raise HashingBusy(retry_after=1)
+
+    def hash(self, password):
+        return self._run(self._hash, password)
+
+    def hash_many(self, passwords):
+        """Hash a bulk job on the pool, waiting for free slots instead of failing fast.
+
+        Holding at most max_concurrency slots at a time leaves the queue to
+        interactive requests, which still get a slot between the job's hashes.
+        """
+        if self._executor is None:
+            return [self._hash(password) for password in passwords]
+        started = time.perf_counter()
+        job_slots = threading.BoundedSemaphore(self.max_concurrency)
+        futures = []
+
+        def release(_):
+            self._slots.release()
+            job_slots.release()
+
+        try:
+            for password in passwords:
+                job_slots.acquire()
+                if not self._slots.acquire(timeout=self.timeout):
+                    job_slots.release()
+                    raise HashingBusy(retry_after=1)
+                future = self._executor.submit(self._hash, password)
+                future.add_done_callback(release)
+                futures.append(future)
+            return [future.result() for future in futures]
+        finally:
+            add_timing('bcrypt', time.perf_counter() - started)
+
+    def _hash(self, password):
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.rounds)).decode('utf-8')
+
+    def check(self, password_hash, password):
+        return self._run(self._check, password_hash, password)
+
+    def _check(self, password_hash, password):
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        except ValueError: # Malformed stored hash
+            return False
+
+    def needs_rehash(self, password_hash):
+        # bcrypt hashes look like $2b$<cost>$<salt+hash>
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+
+password_hasher = PasswordHasher()
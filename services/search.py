@@ -0,0 +1,151 @@
+import logging
+import re
+from sqlalchemy import func, inspect, literal, select, text, union_all
+from models import db, User, List, Item
+from services.list_loader import visible_to
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_LIMIT = 10
+MAX_SEARCH_TERMS = 8
+
+# Restricts a search to the lists a user created or participates in; l is the list table
+_VISIBLE_SQL = '(l.created_by_id = :user_id OR l.id IN (SELECT list_id FROM list_participant WHERE user_id = :user_id))'
+
+
+def autocomplete_usernames(prefix, limit=AUTOCOMPLETE_LIMIT):
+    """Usernames starting with prefix, in order.
+
+    A prefix LIKE ('p%', with the prefix's own wildcards escaped), so the
+    column's collation decides the order and what matches. MySQL answers it
+    with a range on the unique index on username; SQLite's case-insensitive
+    LIKE scans that index instead of the table.
+    """
+    if not prefix:
+        return []
+    return db.session.scalars(
+        select(User.username)
+        .where(User.username.startswith(prefix, autoescape=True))
+        .order_by(User.username)
+        .limit(limit)
+    ).all()
+
+
+def search_terms(query):
+    # Words only: backend query syntax (quotes, operators) never reaches MATCH
+    return re.findall(r'\w+', query.lower())[:MAX_SEARCH_TERMS]
+
+
+class SQLiteFTSSearch:
+    """FTS5 tables list_fts and item_fts, kept in sync by triggers (see migrations). Lower bm25 ranks first."""
+
+    name = 'fts5'
+    statement = text(f'''
+        SELECT 'list' AS kind, l.id AS id, l.name AS name, l.id AS list_id, l.name AS list_name, bm25(list_fts) AS score
+        FROM list_fts JOIN list l ON l.id = list_fts.rowid
+        WHERE list_fts MATCH :match AND {_VISIBLE_SQL}
+        UNION ALL
+        SELECT 'item', i.id, i.name, l.id, l.name, bm25(item_fts)
+        FROM item_fts JOIN item i ON i.id = item_fts.rowid JOIN list l ON l.id = i.list_id
+        WHERE item_fts MATCH :match AND {_VISIBLE_SQL}
+        ORDER BY score, kind, id
+        LIMIT :limit OFFSET :offset
+    ''')
+
+    def search(self, user_id, terms, limit, offset):
+        match = ' AND '.join(f'"{term}"*' for term in terms) # Every word, each as a prefix
+        return db.session.execute(self.statement, {'match': match, 'user_id': user_id, 'limit': limit, 'offset': offset}).all()
+
+
+class MySQLFulltextSearch:
+    """FULLTEXT indexes ft_list_name and ft_item_name. Higher relevance ranks first.
+
+    Words shorter than innodb_ft_min_token_size (3 by default) and stopwords are
+    not indexed, so they never match.
+    """
+
+    name = 'fulltext'
+    statement = text(f'''
+        SELECT 'list' AS kind, l.id AS id, l.name AS name, l.id AS list_id, l.name AS list_name,
+               -MATCH(l.name) AGAINST (:match IN BOOLEAN MODE) AS score
+        FROM list l
+        WHERE MATCH(l.name) AGAINST (:match IN BOOLEAN MODE) AND {_VISIBLE_SQL}
+        UNION ALL
+        SELECT 'item', i.id, i.name, l.id, l.name, -MATCH(i.name) AGAINST (:match IN BOOLEAN MODE)
+        FROM item i JOIN list l ON l.id = i.list_id
+        WHERE MATCH(i.name) AGAINST (:match IN BOOLEAN MODE) AND {_VISIBLE_SQL}
+        ORDER BY score, kind, id
+        LIMIT :limit OFFSET :offset
+    ''')
+
+    def search(self, user_id, terms, limit, offset):
+        match = ' '.join(f'+{term}*' for term in terms)
+        return db.session.execute(self.statement, {'match': match, 'user_id': user_id, 'limit': limit, 'offset': offset}).all()
+
+
+class LikeSearch:
+    """Substring scan for databases without a full-text index. Correct but unranked and slow on large tables."""
+
+    name = 'like'
+
+    def search(self, user_id, terms, limit, offset):
+        lists = select(
+            literal('list').label('kind'), List.id.label('id'), List.name.label('name'),
+            List.id.label('list_id'), List.name.label('list_name'), literal(0).label('score'),
+        ).where(visible_to(user_id), *[func.lower(List.name).contains(term, autoescape=True) for term in terms])
+        items = select(
+            literal('item'), Item.id, Item.name, List.id, List.name, literal(0),
+        ).join(List, Item.list_id == List.id).where(
+            visible_to(user_id), *[func.lower(Item.name).contains(term, autoescape=True) for term in terms]
+        )
+        statement = union_all(lists, items).order_by('kind', 'id').limit(limit).offset(offset)
+        return db.session.execute(statement).all()
+
+
+class Search:
+    """Full-text search over list and item names, scoped to the lists a user can see.
+
+    The backend is picked per engine on first use: FTS5 on SQLite and FULLTEXT
+    on MySQL when the search migration has run, a LIKE scan otherwise.
+    """
+
+    def __init__(self):
+        self._backends = {}
+
+    def backend(self):
+        engine = db.engine
+        backend = self._backends.get(engine)
+        if backend is None:
+            backend = self._backends[engine] = self._pick_backend(engine)
+        return backend
+
+    def _pick_backend(self, engine):
+        inspector = inspect(engine)
+        if engine.dialect.name == 'sqlite' and inspector.has_table('item_fts'):
+            return SQLiteFTSSearch()
+        if engine.dialect.name in ('mysql', 'mariadb') and any(
+            index['name'] == 'ft_item_name' for index in inspector.get_indexes('item')
+        ):
+            return MySQLFulltextSearch()
+        logger.warning('No full-text index on %s; search falls back to LIKE scans', engine.dialect.name)
+        return LikeSearch()
+
+    def search(self, user_id, query, limit, cursor=None):
+        """Return (results, next_cursor) for one page of ranked matches.
+
+        Ranked results have no stable key to seek on, so the cursor is the
+        number of results already returned.
+        """
+        terms = search_terms(query or '')
+        if not terms:
+            return [], None
+        offset = max(cursor or 0, 0) # A negative OFFSET is an SQL error on MySQL
+        rows = self.backend().search(user_id, terms, limit + 1, offset) # One extra row tells us whether there is a next page
+        results = [
+            {'type': row.kind, 'id': row.id, 'name': row.name, 'list_id': row.list_id, 'list_name': row.list_name}
+            for row in rows[:limit]
+        ]
+        return results, offset + limit if len(rows) > limit else None
+
+
+search = Search()
@@ -0,0 +1,119 @@
+import json
+from datetime import datetime
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+# Optional encoders: orjson for speed, msgpack for clients that ask for it.
+# Without them responses are plain stdlib JSON.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+
+def timestamp(value):
+    # Stored datetimes are naive UTC; every payload sends them as ISO-8601 with a Z
+    return value.isoformat(timespec='microseconds') + 'Z' if value else None
+
+
+# Row serializers: each takes a plain column row from services/list_loader.py
+# (or the export query) and returns the dict every API payload uses for it.
+
+def item_data(row):
+    return {
+        'id': row.id,
+        'name': row.name,
+        'is_ticked': bool(row.is_ticked),
+        'added_by': row.added_by, # None once the adder is deleted
+        'added_at': timestamp(row.added_at),
+        'ticked_by': row.ticked_by,
+        'ticked_at': timestamp(row.ticked_at),
+        'version': row.version,
+    }
+
+
+def archived_item_data(row):
+    return {
+        'id': row.item_id,
+        'name': row.name,
+        'added_by': row.added_by,
+        'added_at': timestamp(row.added_at),
+        'ticked_by': row.ticked_by,
+        'ticked_at': timestamp(row.ticked_at),
+        'archived_at': timestamp(row.archived_at),
+    }
+
+
+def list_entry(row):
+    # One dashboard_query row as the dict both the dashboard and the API return
+    return {
+        'id': row.id,
+        'name': row.name,
+        'created_by': row.created_by,
+        'created_at': timestamp(row.created_at),
+        'role': row.role,
+        'is_creator': row.role == 'creator',
+        'item_count': row.item_count,
+        'open_count': int(row.open_count), # SUM comes back as Decimal on MySQL
+    }
+
+
+def user_data(row):
+    return {'id': row.id, 'username': row.username, 'email': row.email}
+
+
+def _default(value):
+    # Types neither encoder handles natively; Flask's default covers Decimal, UUID, dataclasses
+    if isinstance(value, datetime):
+        return timestamp(value)
+    return DefaultJSONProvider.default(value)
+
+
+def dumps(obj):
+    # Compact JSON text, through orjson when it is installed
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, default=_default, separators=(',', ':'))
+
+
+def response_mimetype():
+    # The representation the client prefers; JSON unless it asked for MessagePack and msgpack is installed
+    offered = [JSON_MIMETYPE, *MSGPACK_MIMETYPES] if msgpack is not None else [JSON_MIMETYPE]
+    return request.accept_mimetypes.best_match(offered, default=JSON_MIMETYPE)
+
+
+def response_format():
+    # 'json' or 'msgpack', for ETags that must differ between representations
+    return 'msgpack' if response_mimetype() in MSGPACK_MIMETYPES else 'json'
+
+
+class APIJSONProvider(DefaultJSONProvider):
+    """app.json for this app: jsonify() and returned dicts go through dumps(),
+    or MessagePack when the request's Accept header prefers it."""
+
+    default = staticmethod(_default) # ISO-8601 datetimes instead of Flask's HTTP dates
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.keys() - {'separators'}: # indent and friends need the stdlib encoder
+            return super().dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        mimetype = response_mimetype()
+        if mimetype in MSGPACK_MIMETYPES:
+            response = self._app.response_class(msgpack.packb(obj, default=_default), mimetype=mimetype)
+        elif (self.compact is None and self._app.debug) or self.compact is False:
+            response = super().response(obj)
+        else:
+            response = self._app.response_class(dumps(obj) + '\n', mimetype=self.mimetype)
+        response.vary.add('Accept')
+        return response
@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import with_appcontext
+
+# Brotli is optional; without it only .gz variants are built
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BUILD_DIR = 'dist' # Under the static folder; fingerprinted copies and their compressed variants
+MANIFEST_NAME = 'manifest.json'
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map')
+MIN_COMPRESS_SIZE = 256 # Bytes; smaller files gain nothing from compression
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+ENCODINGS = (('br', '.br'), ('gzip', '.gz')) # Preferred first
+
+
+def _fingerprinted_name(path, content):
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+
+
+def build_assets(static_folder):
+    """Copy every static file to dist/ under a content-hashed name, with .gz (and .br) variants.
+
+    Writes dist/manifest.json mapping each original path to its copy and the
+    encodings built for it. Copies from earlier builds are left in place, so
+    pages rendered before a deploy keep working until the next clean.
+    """
+    build_root = os.path.join(static_folder, BUILD_DIR)
+    manifest = {}
+    for directory, subdirectories, filenames in os.walk(static_folder):
+        if os.path.abspath(directory) == os.path.abspath(static_folder) and BUILD_DIR in subdirectories:
+            subdirectories.remove(BUILD_DIR)
+        for filename in sorted(filenames):
+            source = os.path.join(directory, filename)
+            path = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                content = f.read()
+            target = _fingerprinted_name(path, content)
+            target_path = os.path.join(build_root, target)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            with open(target_path, 'wb') as f:
+                f.write(content)
+
+            encodings = []
+            if path.endswith(COMPRESSIBLE_EXTENSIONS) and len(content) >= MIN_COMPRESS_SIZE:
+                with open(target_path + '.gz', 'wb') as f:
+                    f.write(gzip.compress(content, compresslevel=9, mtime=0)) # mtime=0: same input, same bytes
+                encodings.append('gzip')
+                if brotli is not None:
+                    with open(target_path + '.br', 'wb') as f:
+                        f.write(brotli.compress(content, quality=11))
+                    encodings.append('br')
+            manifest[path] = {'file': f'{BUILD_DIR}/{target}', 'encodings': encodings}
+
+    os.makedirs(build_root, exist_ok=True)
+    with open(os.path.join(build_root, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class StaticAssets:
+    """Fingerprinted static files: the asset_url() template helper and the static view serving them.
+
+    Without a build (flask build-assets) asset_url() falls back to the plain
+    static URL, so development needs no extra step.
+    """
+
+    def __init__(self):
+        self.manifest = {}
+        self._encodings = {} # fingerprinted file -> encodings built for it
+
+    def init_app(self, app):
+        self.load_manifest(app.static_folder)
+        app.jinja_env.globals['asset_url'] = self.asset_url
+        app.view_functions['static'] = self.send_static_file
+
+    def load_manifest(self, static_folder):
+        try:
+            with open(os.path.join(static_folder, BUILD_DIR, MANIFEST_NAME)) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+        self._encodings = {entry['file']: entry['encodings'] for entry in self.manifest.values()}
+
+    def asset_url(self, filename, **values):
+        # Drop-in for url_for('static', filename=...) that points at the fingerprinted copy
+        entry = self.manifest.get(filename)
+        return url_for('static', filename=entry['file'] if entry else filename, **values)
+
+    def send_static_file(self, filename):
+        encodings = self._encodings.get(filename)
+        if encodings is None:
+            return current_app.send_static_file(filename)
+
+        # The name changes with the content, so the file can be cached forever
+        send_name, encoding = filename, None
+        for candidate, suffix in ENCODINGS:
+            if candidate in encodings and request.accept_encodings[candidate]:
+                send_name, encoding = filename + suffix, candidate
+                break
+        response = send_from_directory(
+            current_app.static_folder, send_name,
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+            max_age=IMMUTABLE_MAX_AGE,
+        )
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+
+static_assets = StaticAssets()
+
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Fingerprint and precompress static files into static/dist. Run it on deploy."""
+    manifest = build_assets(current_app.static_folder)
+    static_assets.load_manifest(current_app.static_folder)
+    compressed = sum(1 for entry in manifest.values() if entry['encodings'])
+    click.echo(f'Built {len(manifest)} assets ({compressed} precompressed) into {BUILD_DIR}/.')
@@ -0,0 +1,124 @@
+import re
+from sqlalchemy import insert, or_, select
+from models import db, User
+from services.passwords import password_hasher
+
+# API messages for a value that is already taken, by column
+DUPLICATE_MESSAGES = {
+    'username': "Username already exists",
+    'email': "Email already registered",
+}
+USERNAME_MAX_LENGTH = User.__table__.c.username.type.length
+EMAIL_MAX_LENGTH = User.__table__.c.email.type.length
+PASSWORD_HASH_MAX_LENGTH = User.__table__.c.password_hash.type.length
+MAX_IMPORT_USERS = 10000 # Rows with a bcrypt password_hash
+MAX_IMPORT_PASSWORDS = 100 # Rows with a plain password, each hashed at full cost while the request waits
+IMPORT_BATCH_SIZE = 1000
+
+# Names the unique indexes ix_user_username/ix_user_email in backend error messages:
+# SQLite says "user.username", MySQL and PostgreSQL name the index
+_DUPLICATE_COLUMN = re.compile(r'\b(?:ix_user_|user\.)(username|email)\b')
+
+
+def duplicate_field(error):
+    """Return 'username' or 'email' if an IntegrityError is a clash on that column, else None."""
+    # MySQL quotes the duplicate value before the key name, so the last match is the index
+    matches = _DUPLICATE_COLUMN.findall(str(error.orig))
+    return matches[-1] if matches else None
+
+
+def taken_fields(username, email):
+    # Which of username/email already belong to someone, in one query
+    rows = db.session.execute(
+        select(User.username, User.email).where(or_(User.username == username, User.email == email))
+    ).all()
+    taken = set()
+    for row in rows:
+        if row.username == username:
+            taken.add('username')
+        if row.email == email:
+            taken.add('email')
+    return taken
+
+
+def _import_row_error(row):
+    if not isinstance(row, dict):
+        return "Each user must be an object"
+    username, email = row.get('username'), row.get('email')
+    if not isinstance(username, str) or not username or not isinstance(email, str) or not email:
+        return "Username and email are required"
+    if len(username) > USERNAME_MAX_LENGTH:
+        return f"Username must be at most {USERNAME_MAX_LENGTH} characters"
+    if len(email) > EMAIL_MAX_LENGTH:
+        return f"Email must be at most {EMAIL_MAX_LENGTH} characters"
+    password, password_hash = row.get('password'), row.get('password_hash')
+    if password is not None and not isinstance(password, str):
+        return "Password must be a string"
+    if password:
+        return None
+    if not isinstance(password_hash, str) or not password_hash.startswith('$2'):
+        return "A password or a bcrypt password_hash is required"
+    if len(password_hash) > PASSWORD_HASH_MAX_LENGTH:
+        return f"Password hash must be at most {PASSWORD_HASH_MAX_LENGTH} characters"
+    return None
+
+
+def plain_password_count(rows):
+    # Rows import_users would hash
+    return sum(1 for row in rows if isinstance(row, dict) and row.get('password'))
+
+
+def import_users(rows):
+    """Create many users in one transaction.
+
+    Every row is validated first, including clashes with existing users (one
+    query per IMPORT_BATCH_SIZE rows) and with other rows of the import; if any
+    row fails, nothing is written. Rows carry either a plain password, which is
+    hashed on the password worker pool, or an existing bcrypt password_hash;
+    callers cap the plain ones at MAX_IMPORT_PASSWORDS. Users are then
+    written with one multi-row INSERT per batch.
+
+    Returns (results, ok) where results holds one dict per row, in order.
+    """
+    errors = [_import_row_error(row) for row in rows]
+
+    seen = {'username': set(), 'email': set()}
+    for index, row in enumerate(rows):
+        if errors[index]:
+            continue
+        for field in ('username', 'email'):
+            if row[field] in seen[field]:
+                errors[index] = errors[index] or DUPLICATE_MESSAGES[field]
+            seen[field].add(row[field])
+
+    for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+        batch = [(index, row) for index, row in enumerate(rows[start:start + IMPORT_BATCH_SIZE], start) if not errors[index]]
+        if not batch:
+            continue
+        usernames = {row['username'] for _, row in batch}
+        emails = {row['email'] for _, row in batch}
+        existing = db.session.execute(
+            select(User.username, User.email).where(or_(User.username.in_(usernames), User.email.in_(emails)))
+        ).all()
+        taken_usernames = {existing_row.username for existing_row in existing}
+        taken_emails = {existing_row.email for existing_row in existing}
+        for index, row in batch:
+            if row['username'] in taken_usernames:
+                errors[index] = DUPLICATE_MESSAGES['username']
+            elif row['email'] in taken_emails:
+                errors[index] = DUPLICATE_MESSAGES['email']
+
+    if any(errors):
+        return [{'index': index, 'status': 'error', 'msg': error} if error else {'index': index, 'status': 'skipped'}
+                for index, error in enumerate(errors)], False
+
+    plain = [index for index, row in enumerate(rows) if row.get('password')]
+    hashes = dict(zip(plain, password_hasher.hash_many([rows[index]['password'] for index in plain])))
+    values = [
+        {'username': row['username'], 'email': row['email'], 'password_hash': hashes.get(index) or row['password_hash']}
+        for index, row in enumerate(rows)
+    ]
+    for start in range(0, len(values), IMPORT_BATCH_SIZE):
+        db.session.execute(insert(User), values[start:start + IMPORT_BATCH_SIZE])
+    db.session.commit() # A concurrent insert of the same name still surfaces here as an IntegrityError
+    return [{'index': index, 'status': 'created'} for index in range(len(rows))], True
@@ -0,0 +1,56 @@
+import os
+import tempfile
+from contextlib import contextmanager
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+# app.py builds the app from the environment at import time
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='dbwe-tests-'), 'test.db')
+os.environ.setdefault('SECRET_KEY', 'test-secret')
+os.environ.setdefault('JWT_SECRET_KEY', 'test-jwt-secret-test-jwt-secret-test-jwt-secret')
+os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+
+from app import app as flask_app
+from models import db
+from services.cache import response_cache
+from services.fragment_cache import fragment_cache
+from services.identity import identity_cache
+
+
+@pytest.fixture
+def app():
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    # Ids are reused once the tables are recreated, so nothing cached may survive a test
+    response_cache.clear()
+    fragment_cache.clear()
+    identity_cache._snapshots.clear()
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager yielding a list whose length is the number of statements run inside it."""
+    @contextmanager
+    def counter():
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+    return counter
+
+
+@pytest.fixture
+def api_headers(app):
+    """Function returning the Authorization header of an API request made as a user id."""
+    def headers(user_id):
+        return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+    return headers
@@ -0,0 +1,83 @@
+from sqlalchemy import func, select, text
+from models import db, User, List, Item, ItemArchive, ItemTombstone, ListParticipant
+
+
+def make_user(name):
+    user = User(username=name, email=f'{name}@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def make_list(creator, size, helper):
+    # size items added and half of them ticked by helper, who also shares the list
+    lst = List(name=f'{creator.username} list {size}', created_by_id=creator.id)
+    db.session.add(lst)
+    db.session.flush()
+    db.session.add(ListParticipant(list_id=lst.id, user_id=helper.id))
+    db.session.add_all([
+        Item(name=f'item {i}', list_id=lst.id, added_by_id=helper.id,
+             is_ticked=i % 2 == 0, ticked_by_id=helper.id if i % 2 == 0 else None)
+        for i in range(size)
+    ])
+    db.session.add_all([
+        ItemArchive(item_id=size + i, name=f'archived {i}', list_id=lst.id, added_by_id=helper.id, ticked_by_id=helper.id)
+        for i in range(size // 10)
+    ])
+    db.session.add_all([ItemTombstone(item_id=2 * size + i, list_id=lst.id) for i in range(size // 10)])
+    db.session.flush()
+    return lst.id
+
+
+def count_rows(model, *conditions):
+    return db.session.scalar(select(func.count()).select_from(model).where(*conditions))
+
+
+def delete_and_count(count_queries, model, id):
+    db.session.remove() # Nothing loaded that the delete could cascade through in Python
+    obj = db.session.get(model, id)
+    with count_queries() as statements:
+        db.session.delete(obj)
+        db.session.commit()
+    return len(statements)
+
+
+def test_foreign_keys_are_enforced(app):
+    assert db.session.execute(text('PRAGMA foreign_keys')).scalar() == 1
+
+
+def test_list_delete_statement_count_does_not_grow_with_children(app, count_queries):
+    owner, helper = make_user('owner'), make_user('helper')
+    small, large = make_list(owner, 5, helper), make_list(owner, 500, helper)
+    db.session.commit()
+
+    counts = [delete_and_count(count_queries, List, list_id) for list_id in (small, large)]
+
+    assert counts[0] == counts[1]
+    for model in (Item, ItemArchive, ItemTombstone, ListParticipant):
+        assert count_rows(model) == 0
+
+
+def test_user_delete_statement_count_does_not_grow_with_children(app, count_queries):
+    owner, light, heavy = make_user('owner'), make_user('light'), make_user('heavy')
+    shared = make_list(owner, 5, light)
+    make_list(owner, 200, heavy) # heavy added, ticked and archived items in owner's list
+    heavy_lists = [make_list(heavy, 50, owner) for _ in range(10)]
+    user_ids = [light.id, heavy.id]
+    db.session.commit()
+
+    counts = [delete_and_count(count_queries, User, user_id) for user_id in user_ids]
+
+    assert counts[0] == counts[1]
+    # heavy's own lists went with them, and so did their children
+    assert count_rows(List, List.id.in_(heavy_lists)) == 0
+    assert count_rows(Item, Item.list_id.in_(heavy_lists)) == 0
+    assert count_rows(ItemArchive, ItemArchive.list_id.in_(heavy_lists)) == 0
+    assert count_rows(ListParticipant) == 0
+    # In owner's lists the rows stay, without the deleted users
+    assert count_rows(Item) == 205
+    assert count_rows(Item, Item.added_by_id.isnot(None)) == 0
+    assert count_rows(Item, Item.ticked_by_id.isnot(None)) == 0
+    assert count_rows(ItemArchive) == 20
+    assert count_rows(ItemArchive, ItemArchive.added_by_id.isnot(None) | ItemArchive.ticked_by_id.isnot(None)) == 0
+    assert db.session.get(List, shared) is not None
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from models import db, User, List, Item
+from services.delta_sync import make_cursor, parse_cursor
+
+
+def make_list():
+    # alice's list with two items bob added and ticked
+    alice = User(username='alice', email='alice@example.com', password_hash='x')
+    bob = User(username='bob', email='bob@example.com', password_hash='x')
+    db.session.add_all([alice, bob])
+    db.session.flush()
+    lst = List(name='groceries', created_by_id=alice.id)
+    db.session.add(lst)
+    db.session.flush()
+    db.session.add_all([
+        Item(name=name, list_id=lst.id, added_by_id=bob.id, is_ticked=True, ticked_by_id=bob.id)
+        for name in ('milk', 'eggs')
+    ])
+    db.session.commit()
+    return alice.id, bob.id, lst.id
+
+
+def test_cursor_round_trip():
+    at = datetime(2026, 10, 18, 9, 30, 15, 250000)
+    assert parse_cursor(make_cursor(7, at)) == (7, at)
+
+
+@pytest.mark.parametrize('cursor', [
+    '', '7', '7.', 'x.1000', '7.x', '7.1.2',
+    '1.99999999999999999999', # Past datetime.max: OverflowError/OSError inside
+    '1.-99999999999999999',
+])
+def test_malformed_cursor_is_a_value_error(cursor):
+    with pytest.raises(ValueError):
+        parse_cursor(cursor)
+
+
+def synced_cursor(list_id):
+    # A cursor from a sync long after the items last changed, well outside SYNC_OVERLAP
+    an_hour_ago = datetime.utcnow() - timedelta(hours=1)
+    db.session.execute(update(Item).values(updated_at=an_hour_ago))
+    db.session.commit()
+    return make_cursor(db.session.get(List, list_id).version, an_hour_ago + timedelta(minutes=30))
+
+
+def test_renamed_user_is_sent_again(app, api_headers):
+    alice_id, bob_id, list_id = make_list()
+    cursor = synced_cursor(list_id)
+    client = app.test_client()
+
+    assert client.put(f'/api/users/{bob_id}', json={'username': 'robert'}, headers=api_headers(alice_id)).status_code == 200
+    changes = client.get(f'/api/list/{list_id}/changes', query_string={'since': cursor}, headers=api_headers(alice_id)).get_json()
+
+    assert not changes['full']
+    assert [(item['added_by'], item['ticked_by']) for item in changes['items']] == [('robert', 'robert')] * 2
+
+
+def test_deleted_user_is_sent_again(app, api_headers):
+    alice_id, bob_id, list_id = make_list()
+    cursor = synced_cursor(list_id)
+    client = app.test_client()
+
+    assert client.delete(f'/api/users/{bob_id}', headers=api_headers(alice_id)).status_code == 200
+    changes = client.get(f'/api/list/{list_id}/changes', query_string={'since': cursor}, headers=api_headers(alice_id)).get_json()
+
+    assert [(item['added_by'], item['ticked_by']) for item in changes['items']] == [(None, None)] * 2
+
+
+def test_changes_access_and_bad_cursor(app, api_headers):
+    alice_id, bob_id, list_id = make_list()
+    client = app.test_client()
+
+    assert client.get(f'/api/list/{list_id}/changes', headers=api_headers(bob_id)).status_code == 403
+    assert client.get(f'/api/list/{list_id + 1}/changes', headers=api_headers(alice_id)).status_code == 404
+    response = client.get(f'/api/list/{list_id}/changes', query_string={'since': '1.99999999999999999999'}, headers=api_headers(alice_id))
+    assert response.status_code == 400
@@ -0,0 +1,67 @@
+import pytest
+from models import db, User, List, Item
+
+
+@pytest.fixture
+def shopping_list(app):
+    # (user id, list id, ids of the items 'milk' and 'eggs')
+    user = User(username='alice', email='alice@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    lst = List(name='groceries', created_by_id=user.id)
+    db.session.add(lst)
+    db.session.flush()
+    items = [Item(name=name, list_id=lst.id, added_by_id=user.id) for name in ('milk', 'eggs')]
+    db.session.add_all(items)
+    db.session.commit()
+    return user.id, lst.id, [item.id for item in items]
+
+
+def post_batch(app, api_headers, user_id, list_id, body):
+    return app.test_client().post(f'/api/list/{list_id}/items/batch', json=body, headers=api_headers(user_id))
+
+
+def item_names(list_id):
+    db.session.expire_all()
+    return sorted(item.name for item in Item.query.filter_by(list_id=list_id))
+
+
+def test_batch_applies_every_operation(app, api_headers, shopping_list):
+    user_id, list_id, (milk, eggs) = shopping_list
+    response = post_batch(app, api_headers, user_id, list_id, {'operations': [
+        {'op': 'add', 'name': 'bread'},
+        {'op': 'rename', 'id': milk, 'name': 'oat milk'},
+        {'op': 'delete', 'id': eggs},
+    ]})
+    assert response.status_code == 200
+    assert [result['status'] for result in response.get_json()['results']] == ['ok'] * 3
+    assert item_names(list_id) == ['bread', 'oat milk']
+
+
+@pytest.mark.parametrize('bad_operation', [
+    {'op': 'rename', 'id': 10**6, 'name': 'x'}, # Not in this list
+    {'op': 'rename', 'id': True, 'name': 'x'}, # JSON true is not id 1
+    {'op': 'add', 'name': ''},
+    {'op': 'add', 'name': 'x' * 121},
+    {'op': 'explode'},
+    'add',
+])
+def test_one_bad_operation_rolls_back_the_batch(app, api_headers, shopping_list, bad_operation):
+    user_id, list_id, (milk, eggs) = shopping_list
+    response = post_batch(app, api_headers, user_id, list_id, {'operations': [
+        {'op': 'add', 'name': 'bread'},
+        bad_operation,
+        {'op': 'delete', 'id': eggs},
+    ]})
+    assert response.status_code == 400
+    statuses = [result['status'] for result in response.get_json()['results']]
+    assert statuses.count('error') == 1 and statuses[1] == 'error'
+    assert item_names(list_id) == ['eggs', 'milk']
+
+
+@pytest.mark.parametrize('body', [[], 'operations', {'operations': []}, {'operations': {}}, {}])
+def test_batch_without_an_operations_array_is_a_400(app, api_headers, shopping_list, body):
+    user_id, list_id, _ = shopping_list
+    response = post_batch(app, api_headers, user_id, list_id, body)
+    assert response.status_code == 400
+    assert response.get_json() == {'msg': 'A non-empty operations array is required'}
@@ -0,0 +1,63 @@
+import pytest
+from models import db, User, List, Item
+
+
+@pytest.fixture
+def shared_item(app):
+    # (alice's id, a stranger's id, list id, item id): alice's list with one open item
+    users = [User(username=name, email=f'{name}@example.com', password_hash='x') for name in ('alice', 'stranger')]
+    db.session.add_all(users)
+    db.session.flush()
+    lst = List(name='groceries', created_by_id=users[0].id)
+    db.session.add(lst)
+    db.session.flush()
+    item = Item(name='milk', list_id=lst.id, added_by_id=users[0].id)
+    db.session.add(item)
+    db.session.commit()
+    return users[0].id, users[1].id, lst.id, item.id
+
+
+def tick(app, api_headers, user_id, list_id, item_id, body):
+    return app.test_client().put(f'/api/list/{list_id}/items/{item_id}/tick', json=body, headers=api_headers(user_id))
+
+
+def test_tick_bumps_the_version(app, api_headers, shared_item):
+    alice, _, list_id, item_id = shared_item
+    response = tick(app, api_headers, alice, list_id, item_id, {'is_ticked': True, 'version': 1})
+    assert response.status_code == 200
+    item = response.get_json()['item']
+    assert (item['is_ticked'], item['ticked_by'], item['version']) == (True, 'alice', 2)
+
+
+def test_stale_version_is_a_conflict(app, api_headers, shared_item):
+    alice, _, list_id, item_id = shared_item
+    assert tick(app, api_headers, alice, list_id, item_id, {'is_ticked': True, 'version': 1}).status_code == 200
+    # Someone who last saw version 1 unticks it
+    response = tick(app, api_headers, alice, list_id, item_id, {'is_ticked': False, 'version': 1})
+    assert response.status_code == 409
+    assert response.get_json()['item']['is_ticked'] is True
+    assert response.get_json()['item']['version'] == 2
+
+
+def test_ticking_a_ticked_item_changes_nothing(app, api_headers, shared_item):
+    alice, _, list_id, item_id = shared_item
+    tick(app, api_headers, alice, list_id, item_id, {'is_ticked': True})
+    response = tick(app, api_headers, alice, list_id, item_id, {'is_ticked': True})
+    assert response.status_code == 200
+    assert response.get_json()['item']['version'] == 2
+
+
+def test_access(app, api_headers, shared_item):
+    alice, stranger, list_id, item_id = shared_item
+    assert tick(app, api_headers, stranger, list_id, item_id, {}).status_code == 403
+    assert tick(app, api_headers, alice, list_id + 1, item_id, {}).status_code == 404
+    assert tick(app, api_headers, alice, list_id, item_id + 1, {}).status_code == 404
+
+
+@pytest.mark.parametrize('body', [[], 'tick', {'is_ticked': 'yes'}, {'version': True}, {'version': '1'}])
+def test_malformed_body_is_a_400(app, api_headers, shared_item, body):
+    alice, _, list_id, item_id = shared_item
+    response = tick(app, api_headers, alice, list_id, item_id, body)
+    assert response.status_code == 400
+    db.session.expire_all()
+    assert not db.session.get(Item, item_id).is_ticked
@@ -0,0 +1,95 @@
+import pytest
+from models import db, User, List, Item
+from services.cache import response_cache
+from services.list_cache import list_namespace, user_lists_namespace, user_list_page
+from services.list_changes import list_changed
+
+
+@pytest.fixture
+def shopping_list(app):
+    # (alice's id, list id, item id): alice's list with one open item
+    alice = User(username='alice', email='alice@example.com', password_hash='x')
+    db.session.add(alice)
+    db.session.flush()
+    lst = List(name='groceries', created_by_id=alice.id)
+    db.session.add(lst)
+    db.session.flush()
+    item = Item(name='milk', list_id=lst.id, added_by_id=alice.id)
+    db.session.add(item)
+    db.session.commit()
+    return alice.id, lst.id, item.id
+
+
+def test_commit_invalidates_the_list_and_its_members(app, shopping_list):
+    alice, list_id, _ = shopping_list
+    generations = (response_cache.generation(list_namespace(list_id)), response_cache.generation(user_lists_namespace(alice)))
+
+    list_changed(list_id)
+    assert (response_cache.generation(list_namespace(list_id)), response_cache.generation(user_lists_namespace(alice))) == generations
+    db.session.commit()
+
+    assert response_cache.generation(list_namespace(list_id)) != generations[0]
+    assert response_cache.generation(user_lists_namespace(alice)) != generations[1]
+
+
+def test_rollback_keeps_the_cache(app, shopping_list):
+    _, list_id, _ = shopping_list
+    generation = response_cache.generation(list_namespace(list_id))
+
+    list_changed(list_id)
+    db.session.rollback()
+    db.session.commit() # Nothing pending any more
+
+    assert response_cache.generation(list_namespace(list_id)) == generation
+
+
+def test_dashboard_page_is_refreshed_after_a_change(app, shopping_list):
+    alice, list_id, item_id = shopping_list
+    assert user_list_page(alice, 10, None)[0][0]['open_count'] == 1
+
+    db.session.get(Item, item_id).is_ticked = True
+    list_changed(list_id)
+    db.session.commit()
+
+    assert user_list_page(alice, 10, None)[0][0]['open_count'] == 0
+
+
+def test_unchanged_list_is_not_modified(app, api_headers, shopping_list):
+    alice, list_id, _ = shopping_list
+    client = app.test_client()
+    first = client.get(f'/api/list/{list_id}', headers=api_headers(alice))
+    assert first.status_code == 200 and first.headers['ETag']
+
+    again = client.get(f'/api/list/{list_id}', headers={**api_headers(alice), 'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
+
+
+def test_stale_etag_gets_the_new_list(app, api_headers, shopping_list):
+    alice, list_id, item_id = shopping_list
+    client = app.test_client()
+    stale = client.get(f'/api/list/{list_id}', headers=api_headers(alice)).headers['ETag']
+
+    tick = client.put(f'/api/list/{list_id}/items/{item_id}/tick', json={'is_ticked': True}, headers=api_headers(alice))
+    assert tick.status_code == 200
+
+    response = client.get(f'/api/list/{list_id}', headers={**api_headers(alice), 'If-None-Match': stale})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != stale
+    assert response.get_json()['list_detail']['items'][0]['is_ticked'] is True
+
+
+def test_change_made_behind_the_cache_is_not_served(app, api_headers, shopping_list):
+    # Another worker's commit only invalidates its own process cache; the version from the database still moves
+    alice, list_id, _ = shopping_list
+    client = app.test_client()
+    stale = client.get(f'/api/list/{list_id}', headers=api_headers(alice)).headers['ETag']
+
+    lst = db.session.get(List, list_id)
+    lst.name = 'weekend groceries'
+    lst.version += 1
+    db.session.commit() # No list_changed, so nothing here was invalidated
+
+    response = client.get(f'/api/list/{list_id}', headers={**api_headers(alice), 'If-None-Match': stale})
+    assert response.status_code == 200
+    assert response.get_json()['list_detail']['name'] == 'weekend groceries'
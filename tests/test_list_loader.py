@@ -0,0 +1,71 @@
+from sqlalchemy import update
+from models import db, User, List, Item
+from services.list_loader import load_list_detail, item_query, dashboard_query
+from services.list_stats import list_stats
+
+
+def make_list(size):
+    users = [User(username=f'user{size}_{i}', email=f'user{size}_{i}@example.com', password_hash='x') for i in range(10)]
+    db.session.add_all(users)
+    db.session.flush()
+    lst = List(name=f'list {size}', created_by_id=users[0].id)
+    db.session.add(lst)
+    db.session.flush()
+    db.session.add_all([
+        Item(name=f'item {i}', list_id=lst.id, added_by_id=users[i % 10].id,
+             is_ticked=i % 2 == 0, ticked_by_id=users[(i + 3) % 10].id if i % 2 == 0 else None)
+        for i in range(size)
+    ])
+    db.session.commit()
+    return lst.id
+
+
+def render_rows(lst):
+    # Everything list_detail.html reads from each item
+    return [(item.name, item.is_ticked, item.added_by_user.username, item.ticked_by_user and item.ticked_by_user.username)
+            for item in lst.items]
+
+
+def test_list_detail_query_count_does_not_grow_with_items(app, count_queries):
+    small, large = make_list(5), make_list(500)
+    counts = {}
+    for list_id in (small, large):
+        db.session.remove() # Nothing from the identity map
+        with count_queries() as statements:
+            rows = render_rows(load_list_detail(list_id))
+        counts[list_id] = len(statements)
+        assert len(rows) == (5 if list_id == small else 500)
+    assert counts[small] == counts[large]
+
+
+def test_item_page_query_count_does_not_grow_with_items(app, count_queries):
+    small, large = make_list(5), make_list(500)
+    counts = {}
+    for list_id in (small, large):
+        db.session.remove()
+        with count_queries() as statements:
+            rows = item_query(list_id).order_by(Item.id).all()
+        counts[list_id] = len(statements)
+        assert all(row.added_by for row in rows)
+    assert counts[small] == counts[large] == 1
+
+
+
+def test_dashboard_open_count_matches_list_stats(app):
+    list_id = make_list(0)
+    creator_id = db.session.get(List, list_id).created_by_id
+    empty = List(name='empty', created_by_id=creator_id)
+    db.session.add(empty)
+    db.session.add_all([
+        Item(name='open', list_id=list_id, is_ticked=False),
+        Item(name='never set', list_id=list_id),
+        Item(name='done', list_id=list_id, is_ticked=True),
+    ])
+    # The column default fills in False on insert; rows from before it existed are NULL, and open
+    db.session.execute(update(Item).where(Item.name == 'never set').values(is_ticked=None))
+    db.session.commit()
+
+    counts = {row.id: (row.item_count, row.open_count) for row in dashboard_query(creator_id)}
+    stats = list_stats(list_id)
+    assert counts[list_id] == (stats['total_items'], stats['open_items']) == (3, 2)
+    assert counts[empty.id] == (0, 0)
@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from models import db, User
+from services.users import duplicate_field, import_users
+
+HASH = '$2b$04$' + 'a' * 53
+
+
+def sqlite_duplicate(**fields):
+    # The IntegrityError SQLite raises for a second user with the same fields
+    db.session.add(User(username='taken', email='taken@example.com', password_hash=HASH))
+    db.session.commit()
+    db.session.add(User(**{'username': 'other', 'email': 'other@example.com', 'password_hash': HASH, **fields}))
+    with pytest.raises(IntegrityError) as excinfo:
+        db.session.commit()
+    db.session.rollback()
+    return excinfo.value
+
+
+@pytest.mark.parametrize('fields, expected', [
+    ({'username': 'taken'}, 'username'),
+    ({'email': 'taken@example.com'}, 'email'),
+])
+def test_duplicate_field_on_sqlite(app, fields, expected):
+    assert duplicate_field(sqlite_duplicate(**fields)) == expected
+
+
+@pytest.mark.parametrize('message, expected', [
+    # MySQL quotes the value before the key name, so a value that looks like a key must not win
+    ("(1062, \"Duplicate entry 'bob' for key 'user.ix_user_username'\")", 'username'),
+    ("(1062, \"Duplicate entry 'ix_user_email' for key 'ix_user_username'\")", 'username'),
+    ('duplicate key value violates unique constraint "ix_user_email"', 'email'),
+    ('NOT NULL constraint failed: user.password_hash', None),
+    ('FOREIGN KEY constraint failed', None),
+])
+def test_duplicate_field_messages(message, expected):
+    assert duplicate_field(IntegrityError('INSERT', {}, Exception(message))) == expected
+
+
+@pytest.mark.parametrize('row, error', [
+    ({'username': 'a', 'email': 'a@example.com', 'password': 1, 'password_hash': HASH}, "Password must be a string"),
+    ({'username': 'a', 'email': 'a@example.com', 'password_hash': HASH + 'x' * 100}, "Password hash must be at most 128 characters"),
+    ({'username': 'a', 'email': 'a@example.com', 'password_hash': 'plain'}, "A password or a bcrypt password_hash is required"),
+    ({'username': 'a', 'email': 'a@example.com'}, "A password or a bcrypt password_hash is required"),
+])
+def test_import_rejects_bad_passwords_per_row(app, row, error):
+    good = {'username': 'b', 'email': 'b@example.com', 'password_hash': HASH}
+    results, ok = import_users([good, row])
+    assert not ok
+    assert results == [{'index': 0, 'status': 'skipped'}, {'index': 1, 'status': 'error', 'msg': error}]
+    assert User.query.count() == 0
+
+
+def test_import_api_rejects_non_string_password(app, api_headers):
+    db.session.add(User(username='admin', email='admin@example.com', password_hash=HASH))
+    db.session.commit()
+    rows = [{'username': 'a', 'email': 'a@example.com', 'password': 1, 'password_hash': HASH}]
+    response = app.test_client().post('/api/users/import', json={'users': rows}, headers=api_headers(1))
+    assert response.status_code == 400
+    assert response.get_json()['results'][0]['msg'] == "Password must be a string"
+
+
+@pytest.mark.parametrize('body', [[], 'users', {'users': []}, {'users': {}}])
+def test_import_api_without_a_users_array_is_a_400(app, api_headers, body):
+    db.session.add(User(username='admin', email='admin@example.com', password_hash=HASH))
+    db.session.commit()
+    response = app.test_client().post('/api/users/import', json=body, headers=api_headers(1))
+    assert response.status_code == 400
+    assert response.get_json() == {'msg': 'A non-empty users array is required'}